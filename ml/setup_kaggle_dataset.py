@@ -5,9 +5,13 @@ Run this script to download all datasets from Kaggle
 """
 
 import os
+import csv
 import json
+import shutil
 import subprocess
-import pandas as pd
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Dataset configurations
@@ -34,6 +38,20 @@ DATASETS = [
     }
 ]
 
+# Rows scanned per file for the missing-value summary
+EXPLORE_SAMPLE_ROWS = 1000
+
+# Cell values treated as missing (subset of pandas' default na_values)
+NA_VALUES = {'', 'NA', 'N/A', 'NaN', 'nan', 'null', 'NULL', 'None'}
+
+# Downloads run concurrently; keep each status line intact
+_print_lock = threading.Lock()
+
+def _log(message):
+    """Thread-safe print"""
+    with _print_lock:
+        print(message)
+
 def setup_kaggle_api():
     """Setup Kaggle API credentials"""
     kaggle_dir = Path.home() / '.kaggle'
@@ -63,7 +81,7 @@ def download_dataset(dataset_config):
     dataset_name = dataset_config['name']
     description = dataset_config['description']
     
-    print(f"\n📥 Downloading {description} ({dataset_name})...")
+    _log(f"\n📥 Downloading {description} ({dataset_name})...")
     try:
         result = subprocess.run(
             ['kaggle', 'datasets', 'download', '-d', dataset_name, '-p', str(data_dir)],
@@ -71,24 +89,85 @@ def download_dataset(dataset_config):
             capture_output=True,
             text=True
         )
-        print(f"✓ {description} downloaded successfully!")
+        _log(f"✓ {description} downloaded successfully!")
         
-        # Extract if zip
-        import zipfile
-        for file in data_dir.glob('*.zip'):
-            print(f"   Extracting {file.name}...")
-            with zipfile.ZipFile(file, 'r') as zip_ref:
-                zip_ref.extractall(data_dir)
+        # Extract if zip (only this dataset's archive; others may still be downloading)
+        file = data_dir / f"{dataset_name.split('/')[-1]}.zip"
+        if file.exists():
+            _log(f"   Extracting {file.name}...")
+            extract_zip(file, data_dir)
             file.unlink()
         
         return True
     except subprocess.CalledProcessError as e:
-        print(f"✗ Error downloading {description}: {e.stderr if e.stderr else e}")
+        _log(f"✗ Error downloading {description}: {e.stderr if e.stderr else e}")
         return False
     except Exception as e:
-        print(f"✗ Unexpected error downloading {description}: {e}")
+        _log(f"✗ Unexpected error downloading {description}: {e}")
         return False
 
+def extract_zip(zip_path, target_dir):
+    """Stream each archive member straight to its destination in 1 MiB chunks"""
+    root = target_dir.resolve()
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for member in zf.infolist():
+            if member.is_dir():
+                continue
+            dest = (target_dir / member.filename).resolve()
+            # Same path-traversal guard extractall applies
+            if root not in dest.parents:
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(member) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+
+def count_lines(path, chunk_size=1 << 20):
+    """Count newline-terminated lines with buffered binary reads"""
+    lines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+            last = chunk
+    # Final line without trailing newline
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return lines
+
+def summarize_csv(csv_file):
+    """Build a short schema/preview summary of a CSV without parsing it into a DataFrame"""
+    out = [f"\n📄 File: {csv_file.name}"]
+    try:
+        with open(csv_file, 'r', newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.reader(f)
+            columns = next(reader, [])
+            sample = []
+            missing = 0
+            sampled = 0
+            for row in reader:
+                sampled += 1
+                missing += sum(1 for value in row if value.strip() in NA_VALUES)
+                missing += max(0, len(columns) - len(row))
+                if len(sample) < 2:
+                    sample.append(row)
+                if sampled >= EXPLORE_SAMPLE_ROWS:
+                    break
+        
+        rows = max(0, count_lines(csv_file) - 1)
+        out.append(f"   Shape: {rows} rows × {len(columns)} columns")
+        out.append(f"   Columns: {', '.join(columns[:10])}{'...' if len(columns) > 10 else ''}")
+        out.append(f"   Missing values: {missing} total (first {sampled} rows)")
+        if sample:
+            out.append(f"   Sample data:")
+            for row in sample:
+                out.append("   " + ", ".join(row[:10]) + ('...' if len(row) > 10 else ''))
+    except Exception as e:
+        out.append(f"   Error reading file: {e}")
+    return "\n".join(out)
+
 def explore_dataset():
     """Explore and display dataset information"""
     data_dir = Path(__file__).parent / 'data'
@@ -103,18 +182,10 @@ def explore_dataset():
         print("No CSV files found in data directory")
         return
     
-    for csv_file in csv_files:
-        print(f"\n📄 File: {csv_file.name}")
-        try:
-            df = pd.read_csv(csv_file, nrows=1000)  # Sample for exploration
-            print(f"   Shape: {df.shape[0]} rows × {df.shape[1]} columns")
-            print(f"   Columns: {', '.join(df.columns.tolist()[:10])}{'...' if len(df.columns) > 10 else ''}")
-            print(f"   Missing values: {df.isnull().sum().sum()} total")
-            if len(df) > 0:
-                print(f"   Sample data:")
-                print(df.head(2).to_string())
-        except Exception as e:
-            print(f"   Error reading file: {e}")
+    # Summaries are independent and I/O-bound; print them in file order
+    with ThreadPoolExecutor(max_workers=min(len(csv_files), os.cpu_count() or 1)) as executor:
+        for summary in executor.map(summarize_csv, csv_files):
+            print(summary)
 
 def main():
     """Main setup function"""
@@ -134,10 +205,9 @@ def main():
     print("DOWNLOADING DATASETS")
     print("="*60)
     
-    downloaded = 0
-    for dataset_config in DATASETS:
-        if download_dataset(dataset_config):
-            downloaded += 1
+    # Downloads are network-bound, so fetch all datasets concurrently
+    with ThreadPoolExecutor(max_workers=len(DATASETS)) as executor:
+        downloaded = sum(executor.map(download_dataset, DATASETS))
     
     print(f"\n✓ Downloaded {downloaded}/{len(DATASETS)} datasets")
     
@@ -1,4 +1,5 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import numpy as np
 import os
@@ -10,6 +11,11 @@ import traceback
 from predictor import DiseasePredictor
 from validators import validate_prediction_input, validate_batch_input
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 # Configure logging
@@ -19,7 +25,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Serialize responses with orjson (native numpy support, much faster than stdlib json)"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 CORS(app)
 
 # Initialize predictor
@@ -33,6 +53,9 @@ except Exception as e:
     logger.error(f"Failed to load model: {str(e)}")
     predictor = None
 
+# Feature importance is fixed for the loaded model, so serialize it once
+FEATURE_IMPORTANCE_JSON = app.json.dumps(predictor.get_feature_importance()) if predictor is not None else None
+
 # Error handler decorator
 def handle_errors(f):
     @wraps(f)
@@ -120,14 +143,10 @@ def predict_batch():
         raise ValueError("Maximum 100 predictions per batch")
     
     # Validate all inputs
-    for pred_data in predictions_data:
-        validate_prediction_input(pred_data)
+    validate_batch_input(predictions_data)
     
     # Make predictions
-    results = []
-    for pred_data in predictions_data:
-        result = predictor.predict(pred_data)
-        results.append(result)
+    results = predictor.predict_many(predictions_data)
     
     logger.info(f"Batch prediction completed: {len(results)} predictions")
     return jsonify({
@@ -143,8 +162,7 @@ def feature_importance():
     if predictor is None:
         return jsonify({'error': 'Model not loaded'}), 503
     
-    importance = predictor.get_feature_importance()
-    return jsonify(importance), 200
+    return Response(FEATURE_IMPORTANCE_JSON, mimetype=app.json.mimetype), 200
 
 @app.route('/model-info', methods=['GET'])
 @handle_errors
@@ -206,6 +224,8 @@ def method_not_allowed(error):
     """Handle 405 errors"""
     return jsonify({'error': 'Method not allowed', 'type': 'method_not_allowed'}), 405
 
+# Development server only. In production run under Gunicorn with --preload so the
+# model loaded above is shared copy-on-write across workers (see README).
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'production') == 'development'
@@ -1,16 +1,76 @@
 import numpy as np
 import joblib
 from typing import Dict, List
+from functools import lru_cache
+from datetime import datetime
+import json
 import logging
 import os
+import re
 
 logger = logging.getLogger(__name__)
 
+# sklearn trees evaluate splits in float32; feeding it directly avoids a copy per call
+FEATURE_DTYPE = np.float32
+
+# Confidence thresholds for risk levels, matching _calculate_risk_level
+_RISK_BOUNDS = np.array([0.6, 0.8])
+_RISK_LABELS = np.array(["Low", "Medium", "High"])
+
+# Max number of distinct feature vectors whose model output is memoized per predictor
+PREDICTION_CACHE_SIZE = 4096
+
+_WS_RE = re.compile(r"[\s_]+")
+_PUNCT_RE = re.compile(r"[^a-z0-9 ]+")
+
+def _norm(s: str) -> str:
+    return _PUNCT_RE.sub("", _WS_RE.sub(" ", str(s).lower().strip()))
+
+def _load_artifact(path: str):
+    # Memory-map numpy arrays (tree nodes, leaf values) read-only so forked workers
+    # share them through the page cache; fall back to a regular load if that fails
+    try:
+        return joblib.load(path, mmap_mode='r')
+    except Exception:
+        return joblib.load(path)
+
+def _load_model(path: str):
+    # Some estimators write to their fitted arrays while predicting (libsvm's
+    # predict_proba, e.g. SVC and voting ensembles around it), which fails on
+    # read-only memory maps; score one row and reload without mmap if it raises
+    model = _load_artifact(path)
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is None:
+        members = getattr(model, 'estimators_', None) or [None]
+        n_features = getattr(members[0], 'n_features_in_', None)
+    if n_features is None:
+        return model
+    probe = np.zeros((1, n_features), dtype=FEATURE_DTYPE)
+    try:
+        model.predict(probe)
+        if hasattr(model, 'predict_proba'):
+            model.predict_proba(probe)
+    except Exception:
+        logger.info("Model cannot predict from a memory map; loading it into memory")
+        model = joblib.load(path)
+    return model
+
+def _utc_timestamp() -> str:
+    # Same format as str(np.datetime64('now')), without the numpy allocation
+    return datetime.utcnow().isoformat(timespec='seconds')
+
+def _stem(base: str) -> str:
+    # strip one common suffix so "coughing", "coughs" and "cough" share a key
+    for suffix in ('ing', 'ed', 's'):
+        if base.endswith(suffix):
+            return base[:-len(suffix)]
+    return base
+
 class DiseasePredictor:
     """Make predictions using trained models"""
     
     def __init__(self, model_path: str, scaler_path: str = None):
-        self.model = joblib.load(model_path)
+        self.model = _load_model(model_path)
         base_dir = os.path.dirname(os.path.abspath(model_path))
         self.scaler = None
         self.label_encoders = {}
@@ -18,10 +78,16 @@ class DiseasePredictor:
 
         if scaler_path:
             try:
-                self.scaler = joblib.load(scaler_path)
+                self.scaler = _load_artifact(scaler_path)
             except Exception:
                 logger.warning("Could not load scaler")
 
+        # Match scaler statistics to the feature dtype so transform stays in float32
+        for attr in ('mean_', 'scale_'):
+            value = getattr(self.scaler, attr, None)
+            if isinstance(value, np.ndarray) and value.dtype != FEATURE_DTYPE:
+                setattr(self.scaler, attr, value.astype(FEATURE_DTYPE))
+
         # Try to load label encoders and symptom vocabulary saved during training
         try:
             self.label_encoders = joblib.load(os.path.join(base_dir, 'label_encoders.pkl'))
@@ -29,7 +95,6 @@ class DiseasePredictor:
             self.label_encoders = {}
 
         try:
-            import json
             with open(os.path.join(base_dir, 'symptom_vocabulary.json'), 'r') as f:
                 self.symptom_vocabulary = json.load(f)
         except Exception:
@@ -42,6 +107,21 @@ class DiseasePredictor:
             'glucose', 'cholesterol'
         ]
 
+        # Vocabulary is static after load, so normalize it once here
+        self._vocab_index = self._build_vocab_index()
+
+        # SHAP/LIME explainers are expensive to construct, so build them once
+        self._shap_explainer = None
+        self._lime_explainer = None
+        self._init_explainers()
+
+        # Per-instance memo of model outputs keyed by the exact feature bytes
+        self._infer_cached = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._infer)
+
+        # Model metadata never changes at runtime; compute the response payloads once
+        self._model_info_payload = self._compute_model_info()
+        self._feature_importance_payload = self._compute_feature_importance()
+
     def predict(self, data: Dict) -> Dict:
         """
         Make prediction on input data
@@ -52,52 +132,24 @@ class DiseasePredictor:
         Returns:
             Dictionary with prediction, confidence, and risk level
         """
+        features, used_symptoms_path, matched_symptoms = self._build_features(data)
+        prediction, probabilities = self._run_model(features)
+        return self._format_result(prediction, probabilities, used_symptoms_path, matched_symptoms, _utc_timestamp())
+
+    def _build_features(self, data: Dict):
+        """
+        Build the model input row for a single record
+        
+        Returns:
+            Tuple of (features, used_symptoms_path, matched_symptoms)
+        """
         # If we have a symptom vocabulary and symptoms are provided, use symptom vector path
         used_symptoms_path = False
+        matched_symptoms = 0
         if self.symptom_vocabulary and isinstance(data.get('symptoms'), list):
-            import re as _re
-
-            def _norm(s: str) -> str:
-                s = str(s).lower().strip()
-                s = _re.sub(r"[\s_]+", " ", s)
-                s = _re.sub(r"[^a-z0-9 ]+", "", s)
-                return s
-
-            def _variants(base: str):
-                # simple variants generator; can be extended
-                yield base
-                if base.endswith('ing'):
-                    yield base[:-3]
-                if base.endswith('ed'):
-                    yield base[:-2]
-                if base.endswith('s'):
-                    yield base[:-1]
-
-            vocab_index = {}
-            for idx, symptom in enumerate(self.symptom_vocabulary):
-                base = _norm(symptom)
-                for v in _variants(base):
-                    if v not in vocab_index:
-                        vocab_index[v] = idx
-            
-            feature_vec = np.zeros(len(self.symptom_vocabulary), dtype=float)
-            
-            matched = []
-            unmatched = []
-            for s in data.get('symptoms', []):
-                if not s:
-                    continue
-                key = _norm(s)
-                hit = None
-                for v in _variants(key):
-                    if v in vocab_index:
-                        hit = v
-                        break
-                if hit is not None:
-                    feature_vec[vocab_index[hit]] = 1.0
-                    matched.append(s)
-                else:
-                    unmatched.append(s)
+            indices, matched, unmatched = self._match_symptoms(data.get('symptoms', []))
+            # Distinct vocabulary hits; avoids summing the V-length vector
+            n_hits = len(set(indices))
             
             logger.info(f"[Predict] Input symptoms: {data.get('symptoms', [])}")
             logger.info(f"[Predict] Matched {len(matched)} symptoms: {matched}")
@@ -105,35 +157,20 @@ class DiseasePredictor:
                 logger.warning(f"[Predict] Unmatched {len(unmatched)} symptoms: {unmatched}")
             logger.info(f"[Predict] Vocabulary size: {len(self.symptom_vocabulary)}")
             
-            if float(feature_vec.sum()) > 0.0:
-                features = feature_vec.reshape(1, -1)
+            if n_hits > 0:
+                features = self._symptom_matrix([indices])
                 used_symptoms_path = True
-                logger.info(f"[Predict] Using symptom path with {int(feature_vec.sum())} matched symptoms out of {len(data.get('symptoms', []))}")
+                matched_symptoms = n_hits
+                logger.info(f"[Predict] Using symptom path with {n_hits} matched symptoms out of {len(data.get('symptoms', []))}")
             else:
                 # Fall back to vitals path when no symptoms match vocabulary
                 used_symptoms_path = False
                 logger.warning(f"[Predict] No symptoms matched vocabulary, falling back to vitals path. Unmatched: {unmatched}")
-                features = np.array([
-                    data.get('age', 0),
-                    data.get('gender', 0),
-                    data.get('weight', 0),
-                    data.get('blood_pressure_systolic', 0),
-                    data.get('blood_pressure_diastolic', 0),
-                    data.get('glucose', 0),
-                    data.get('cholesterol', 0)
-                ]).reshape(1, -1)
+                features = self._vitals_features(data)
         else:
             logger.info(f"[Predict] Symptom vocabulary available: {bool(self.symptom_vocabulary)}, symptoms provided: {bool(data.get('symptoms'))}")
             logger.info("[Predict] Using vitals path")
-            features = np.array([
-                data.get('age', 0),
-                data.get('gender', 0),
-                data.get('weight', 0),
-                data.get('blood_pressure_systolic', 0),
-                data.get('blood_pressure_diastolic', 0),
-                data.get('glucose', 0),
-                data.get('cholesterol', 0)
-            ]).reshape(1, -1)
+            features = self._vitals_features(data)
         
         # Scale features if scaler available (only for vitals path)
         if self.scaler and not used_symptoms_path:
@@ -145,29 +182,148 @@ class DiseasePredictor:
         
         # Validate we have any usable signal; if not, return clear 400 via Flask handler
         try:
-            from numpy import isfinite as _isfinite
             if not used_symptoms_path:
                 # If vitals are all zeros or non-finite, reject
-                if float(np.nansum(features)) == 0.0 or not bool(np.all(_isfinite(features))):
+                if float(np.nansum(features)) == 0.0 or not bool(np.all(np.isfinite(features))):
                     raise ValueError("No valid symptoms matched vocabulary and vitals are missing. Please add symptoms or vitals.")
         except Exception:
             # Non-fatal
             pass
         
-        # Make prediction
-        prediction = self.model.predict(features)[0]
+        return features, used_symptoms_path, matched_symptoms
+
+    def _run_model(self, features: np.ndarray):
+        """Return (prediction, probabilities) for a single row, memoized on the feature vector"""
+        features = np.ascontiguousarray(features, dtype=FEATURE_DTYPE)
+        return self._infer_cached(features.tobytes())
+
+    def predict_many(self, data_list: List[Dict]) -> List[Dict]:
+        """
+        Make predictions on a batch of inputs with one model call per feature path
         
-        # Get confidence score
-        probabilities = None
+        Args:
+            data_list: List of dictionaries with health features
+            
+        Returns:
+            List of prediction dictionaries, in input order
+        """
+        n = len(data_list)
+        results: List[Dict] = [None] * n
+        if n == 0:
+            return results
+
+        # Route each row to the symptom or vitals path, keeping original positions
+        symptom_rows: List[int] = []
+        symptom_indices: List[List[int]] = []
+        vitals_rows: List[int] = []
+        for i, data in enumerate(data_list):
+            if self.symptom_vocabulary and isinstance(data.get('symptoms'), list):
+                indices, _, _ = self._match_symptoms(data.get('symptoms', []))
+                if indices:
+                    symptom_rows.append(i)
+                    symptom_indices.append(indices)
+                    continue
+            vitals_rows.append(i)
+
+        # One timestamp for the whole batch
+        timestamp = _utc_timestamp()
+
+        logger.info(f"[PredictMany] {n} rows: {len(symptom_rows)} symptom path, {len(vitals_rows)} vitals path")
+
+        if symptom_rows:
+            X = self._symptom_matrix(symptom_indices)
+            matched_counts = X.sum(axis=1)
+            self._predict_rows(X, symptom_rows, results, True, matched_counts, timestamp)
+
+        if vitals_rows:
+            X = self._vitals_matrix([data_list[i] for i in vitals_rows])
+            if self.scaler:
+                try:
+                    X = self.scaler.transform(X)
+                except Exception:
+                    pass
+            self._predict_rows(X, vitals_rows, results, False, None, timestamp)
+
+        return results
+
+    def _symptom_matrix(self, symptom_indices: List[List[int]]) -> np.ndarray:
+        """Build the (N, V) binary symptom matrix with a single scatter (shared by single and batch paths)"""
+        X = np.zeros((len(symptom_indices), len(self.symptom_vocabulary)), dtype=FEATURE_DTYPE)
+        counts = [len(indices) for indices in symptom_indices]
+        total = sum(counts)
+        rows = np.repeat(np.arange(len(symptom_indices)), counts)
+        cols = np.fromiter((i for indices in symptom_indices for i in indices), dtype=np.intp, count=total)
+        X[rows, cols] = 1.0
+        return X
+
+    def _vitals_matrix(self, rows: List[Dict]) -> np.ndarray:
+        """Build the (N, F) vitals matrix column by column, in `feature_names` order"""
+        n = len(rows)
+        return np.column_stack([
+            np.fromiter((d.get(name, 0) for d in rows), dtype=FEATURE_DTYPE, count=n)
+            for name in self.feature_names
+        ])
+
+    def _infer(self, features_key: bytes):
+        """Run the model on a single feature row; wrapped by an LRU cache in __init__"""
+        features = np.frombuffer(features_key, dtype=FEATURE_DTYPE).reshape(1, -1)
+        predictions, probabilities = self._model_outputs(features)
+        if probabilities is None:
+            return predictions[0], None
+        probabilities = probabilities[0]
+        # Cached arrays are shared between callers
+        probabilities.setflags(write=False)
+        return predictions[0], probabilities
+
+    def _model_outputs(self, X):
+        """Return (predictions, probabilities) for X, running the ensemble once when possible"""
         if hasattr(self.model, 'predict_proba'):
             try:
-                probabilities = self.model.predict_proba(features)[0]
-            except Exception:
+                probabilities = self.model.predict_proba(X)
+            except Exception as e:
+                logger.warning(f"predict_proba failed, using default confidence: {e}")
                 probabilities = None
+            # predict() is classes_[argmax(predict_proba)] for probabilistic classifiers,
+            # except SVC where Platt-scaled probabilities can disagree with the decision function
+            classes = getattr(self.model, 'classes_', None)
+            if probabilities is not None and classes is not None and not getattr(self.model, 'probability', False):
+                return np.asarray(classes)[np.argmax(probabilities, axis=1)], probabilities
+            return self.model.predict(X), probabilities
+        return self.model.predict(X), None
+
+    def cache_info(self) -> Dict:
+        """Hit/miss statistics of the prediction cache"""
+        return self._infer_cached.cache_info()._asdict()
+
+    def _predict_rows(self, X, positions: List[int], results: List[Dict], used_symptoms_path: bool, matched_counts, timestamp: str) -> None:
+        """Run the model once over a sub-batch and scatter results back to their positions"""
+        # Score each distinct row once; form defaults make duplicates common
+        unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        predictions, probabilities = self._model_outputs(unique_rows)
+        predictions = predictions[inverse]
+        if probabilities is not None:
+            probabilities = probabilities[inverse]
+        # Bucket every row's confidence at once instead of per-row if/elif
+        confidences = probabilities.max(axis=1) if probabilities is not None else np.full(len(positions), 0.85)
+        risk_levels = _RISK_LABELS[np.searchsorted(_RISK_BOUNDS, confidences, side='right')]
+        for r, pos in enumerate(positions):
+            results[pos] = self._format_result(
+                predictions[r],
+                probabilities[r] if probabilities is not None else None,
+                used_symptoms_path,
+                int(matched_counts[r]) if used_symptoms_path else 0,
+                timestamp,
+                str(risk_levels[r])
+            )
+
+    def _format_result(self, prediction, probabilities, used_symptoms_path: bool, matched_symptoms: int, timestamp: str, risk_level: str = None) -> Dict:
+        """Assemble the response dictionary for a single prediction"""
         confidence = float(np.max(probabilities)) if probabilities is not None else 0.85
         
-        # Determine risk level
-        risk_level = self._calculate_risk_level(confidence)
+        # Determine risk level (batch callers pass it precomputed)
+        if risk_level is None:
+            risk_level = self._calculate_risk_level(confidence)
         
         # Map prediction to disease label if encoder available
         predicted_label = None
@@ -195,7 +351,9 @@ class DiseasePredictor:
                     # Fall back to numeric class ids
                     class_labels = [str(i) for i in range(len(probabilities))]
                 k = min(5, len(probabilities))
-                top_indices = np.argsort(probabilities)[::-1][:k]
+                # O(C) selection of the k largest, then sort only those k
+                idx = np.sort(np.argpartition(probabilities, -k)[-k:])
+                top_indices = idx[np.argsort(probabilities[idx], kind='stable')[::-1]]
                 for idx in top_indices:
                     label = class_labels[idx] if idx < len(class_labels) else str(idx)
                     prob = float(probabilities[idx])
@@ -203,8 +361,6 @@ class DiseasePredictor:
             except Exception:
                 top_k = []
 
-        # Count matched symptoms if symptoms path used
-        matched_symptoms = int(features.sum()) if used_symptoms_path else 0
         return {
             'predicted_disease': predicted_label if predicted_label is not None else str(prediction),
             'disease_code': int(prediction),
@@ -215,11 +371,15 @@ class DiseasePredictor:
             'matched_symptoms': matched_symptoms,
             'model_type': type(self.model).__name__,
             'top_k': top_k,
-            'timestamp': str(np.datetime64('now'))
+            'timestamp': timestamp
         }
 
     def get_model_info(self) -> Dict:
         """Get model information"""
+        return {**self._model_info_payload, 'prediction_cache': self.cache_info()}
+
+    def _compute_model_info(self) -> Dict:
+        """Static part of get_model_info; depends only on the loaded artifacts"""
         disease_classes = []
         try:
             if 'disease' in self.label_encoders:
@@ -248,50 +408,14 @@ class DiseasePredictor:
         Returns:
             Dictionary with explanation, feature importance, and optional SHAP/LIME
         """
-        prediction = self.predict(data)
+        # Build features and run the model once; SHAP/LIME reuse the same vector
+        feature_vector, used_symptoms_path, matched_symptoms = self._build_features(data)
+        pred, probabilities = self._run_model(feature_vector)
+        prediction = self._format_result(pred, probabilities, used_symptoms_path, matched_symptoms, _utc_timestamp())
         
         # Get feature importance
         importance_info = self.get_feature_importance()
         
-        # Prepare feature vector for SHAP/LIME
-        feature_vector = None
-        if self.symptom_vocabulary and isinstance(data.get('symptoms'), list):
-            # Symptom path
-            import re as _re
-            def _norm(s: str) -> str:
-                s = str(s).lower().strip()
-                s = _re.sub(r"[\s_]+", " ", s)
-                s = _re.sub(r"[^a-z0-9 ]+", "", s)
-                return s
-            
-            vocab_index = {}
-            for idx, symptom in enumerate(self.symptom_vocabulary):
-                base = _norm(symptom)
-                vocab_index[base] = idx
-            
-            feature_vec = np.zeros(len(self.symptom_vocabulary), dtype=float)
-            for s in data.get('symptoms', []):
-                key = _norm(s)
-                if key in vocab_index:
-                    feature_vec[vocab_index[key]] = 1.0
-            feature_vector = feature_vec.reshape(1, -1)
-        else:
-            # Vitals path
-            feature_vector = np.array([
-                data.get('age', 0),
-                data.get('gender', 0),
-                data.get('weight', 0),
-                data.get('blood_pressure_systolic', 0),
-                data.get('blood_pressure_diastolic', 0),
-                data.get('glucose', 0),
-                data.get('cholesterol', 0)
-            ]).reshape(1, -1)
-            if self.scaler:
-                try:
-                    feature_vector = self.scaler.transform(feature_vector)
-                except Exception:
-                    pass
-        
         # Create explanation
         explanation = {
             'prediction': prediction,
@@ -303,28 +427,22 @@ class DiseasePredictor:
         
         # Try SHAP explanation (optional)
         try:
-            import shap
-            if feature_vector is not None:
-                if hasattr(self.model, 'predict_proba'):
-                    explainer = shap.TreeExplainer(self.model) if hasattr(self.model, 'tree_') else shap.KernelExplainer(self.model.predict_proba, feature_vector)
-                    shap_values = explainer.shap_values(feature_vector[0])
-                    explanation['shap_values'] = shap_values.tolist() if isinstance(shap_values, np.ndarray) else shap_values
-                    explanation['shap_available'] = True
-        except ImportError:
-            pass
+            if feature_vector is not None and self._shap_explainer is not None:
+                shap_values = self._shap_explainer.shap_values(feature_vector)
+                # Drop the batch axis (per-class lists on older shap versions)
+                if isinstance(shap_values, list):
+                    shap_values = [np.asarray(v)[0].tolist() for v in shap_values]
+                else:
+                    shap_values = np.asarray(shap_values)[0].tolist()
+                explanation['shap_values'] = shap_values
+                explanation['shap_available'] = True
         except Exception:
             pass
         
         # Try LIME explanation (optional)
         try:
-            from lime import lime_tabular
-            if feature_vector is not None:
-                explainer = lime_tabular.LimeTabularExplainer(
-                    feature_vector,
-                    feature_names=self.feature_names if not self.symptom_vocabulary else self.symptom_vocabulary,
-                    mode='classification'
-                )
-                lime_exp = explainer.explain_instance(
+            if feature_vector is not None and self._lime_explainer is not None:
+                lime_exp = self._lime_explainer.explain_instance(
                     feature_vector[0],
                     self.model.predict_proba if hasattr(self.model, 'predict_proba') else self.model.predict,
                     num_features=min(10, len(feature_vector[0]))
@@ -338,6 +456,73 @@ class DiseasePredictor:
         
         return explanation
 
+    def _init_explainers(self) -> None:
+        """Build optional SHAP/LIME explainers for the loaded model"""
+        n_features = getattr(self.model, 'n_features_in_', None)
+        # Without training data at serve time, an all-zero row is the reference input
+        background = np.zeros((1, n_features)) if n_features else None
+
+        try:
+            import shap
+            if hasattr(self.model, 'predict_proba'):
+                try:
+                    self._shap_explainer = shap.TreeExplainer(self.model)
+                except Exception:
+                    if background is not None:
+                        self._shap_explainer = shap.KernelExplainer(self.model.predict_proba, background)
+        except ImportError:
+            pass
+        except Exception:
+            logger.warning("Could not build SHAP explainer")
+
+        try:
+            from lime import lime_tabular
+            if background is not None:
+                self._lime_explainer = lime_tabular.LimeTabularExplainer(
+                    background,
+                    feature_names=self.feature_names if not self.symptom_vocabulary else self.symptom_vocabulary,
+                    mode='classification'
+                )
+        except ImportError:
+            pass
+        except Exception:
+            logger.warning("Could not build LIME explainer")
+
+    def _build_vocab_index(self) -> Dict[str, int]:
+        """Map normalized symptom names, then their stems, to vocabulary positions"""
+        bases = [_norm(symptom) for symptom in self.symptom_vocabulary]
+        vocab_index = {}
+        # Exact names take precedence over any stem that happens to collide with them
+        for idx, base in enumerate(bases):
+            vocab_index.setdefault(base, idx)
+        for idx, base in enumerate(bases):
+            vocab_index.setdefault(_stem(base), idx)
+        return vocab_index
+
+    def _match_symptoms(self, symptoms: List):
+        """Resolve input symptoms to vocabulary indices; returns (indices, matched, unmatched)"""
+        vocab_index = self._vocab_index
+        indices = []
+        matched = []
+        unmatched = []
+        for s in symptoms:
+            if not s:
+                continue
+            key = _norm(s)
+            hit = vocab_index.get(key)
+            if hit is None:
+                hit = vocab_index.get(_stem(key))
+            if hit is not None:
+                indices.append(hit)
+                matched.append(s)
+            else:
+                unmatched.append(s)
+        return indices, matched, unmatched
+
+    def _vitals_features(self, data: Dict) -> np.ndarray:
+        """Build the (1, F) vitals feature row in `feature_names` order"""
+        return np.array([data.get(name, 0) for name in self.feature_names], dtype=FEATURE_DTYPE).reshape(1, -1)
+
     def _generate_explanation(self, data: Dict, prediction: Dict) -> str:
         """Generate human-readable explanation"""
         disease = prediction['predicted_disease']
@@ -365,6 +550,9 @@ class DiseasePredictor:
         return "Low"
 
     def get_feature_importance(self) -> Dict:
+        return self._feature_importance_payload
+
+    def _compute_feature_importance(self) -> Dict:
         if hasattr(self.model, 'feature_importances_'):
             importances = self.model.feature_importances_.tolist()
             return {
@@ -1,6 +1,18 @@
 """Input validation for ML service"""
 
-SUPPORTED_SYMPTOMS = {
+import logging
+import re
+from functools import lru_cache
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"[\s_]+")
+_PUNCT_RE = re.compile(r"[^a-z0-9 ]+")
+# Characters that survive normalization unchanged
+_ALLOWED = frozenset("abcdefghijklmnopqrstuvwxyz0123456789 ")
+
+SUPPORTED_SYMPTOMS = frozenset({
     "chest pain", "shortness of breath", "fatigue", "dizziness",
     "headache", "fever", "cough", "runny nose", "sore throat",
     "nausea", "vomiting", "diarrhea", "loss of appetite", "abdominal pain",
@@ -8,16 +20,69 @@ SUPPORTED_SYMPTOMS = {
     "dry mouth", "weakness", "sweating", "tremor", "anxiety", "insomnia",
     "back pain", "neck pain", "shoulder pain", "arm pain", "leg pain",
     "numbness", "tingling", "itching", "bruising", "swelling",
-}
+})
+
+# Fixed column order for binary symptom vectors
+_SYMPTOM_INDEX = {name: i for i, name in enumerate(sorted(SUPPORTED_SYMPTOMS))}
+
+# Vitals fields in validation order: (name, min, max, error message).
+# Bounds are inclusive; gender (no bounds) must be one of _GENDER_OK.
+_FIELD_SPECS = (
+    ('age', 0, 150, "Age must be a number between 0 and 150"),
+    ('gender', None, None, "Gender must be 0 (Female) or 1 (Male)"),
+    ('weight', 20, 300, "Weight must be between 20 and 300 kg"),
+    ('blood_pressure_systolic', 50, 250, "Systolic BP must be between 50 and 250"),
+    ('blood_pressure_diastolic', 30, 150, "Diastolic BP must be between 30 and 150"),
+    ('glucose', 40, 400, "Glucose must be between 40 and 400 mg/dL"),
+    ('cholesterol', 50, 500, "Cholesterol must be between 50 and 500 mg/dL"),
+)
+_REQUIRED_FIELDS = tuple(spec[0] for spec in _FIELD_SPECS)
+_GENDER_OK = (0, 1)
+
+# Per-field bounds as arrays (columns in _REQUIRED_FIELDS order) for the vectorized batch check
+_FIELD_LO = np.array([min(_GENDER_OK) if lo is None else lo for _, lo, _, _ in _FIELD_SPECS], dtype=np.float64)
+_FIELD_HI = np.array([max(_GENDER_OK) if hi is None else hi for _, _, hi, _ in _FIELD_SPECS], dtype=np.float64)
+_GENDER_COL = _REQUIRED_FIELDS.index('gender')
+
+def _as_number(value):
+    """Numeric value as float, NaN for missing or non-numeric values"""
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+def _is_symptoms_only(data):
+    """Symptoms given as a list of names, which lets the request skip vitals"""
+    symptoms = data.get('symptoms', [])
+    return isinstance(symptoms, list) and (len(symptoms) > 0) and isinstance(symptoms[0], (str,))
 
 def normalize_symptom(symptom_str: str) -> str:
     """Normalize symptom string for matching"""
-    import re
     s = str(symptom_str).strip().lower()
+    # Fast path: already-clean input (the common case) needs no regex work
+    if _ALLOWED.issuperset(s) and "  " not in s:
+        return s
     # Remove extra spaces and punctuation
-    s = re.sub(r"[\s_]+", " ", s)
-    s = re.sub(r"[^a-z0-9 ]+", "", s)
-    return s.strip()
+    s = _WS_RE.sub(" ", s)
+    return _PUNCT_RE.sub("", s).strip()
+
+def encode_symptoms(symptoms) -> np.ndarray:
+    """
+    Encode symptom names as a binary vector over SUPPORTED_SYMPTOMS
+    
+    Args:
+        symptoms: List of symptom names; unrecognized names are ignored
+        
+    Returns:
+        uint8 array with one column per supported symptom (sorted order)
+    """
+    vector = np.zeros(len(_SYMPTOM_INDEX), dtype=np.uint8)
+    indices = [_SYMPTOM_INDEX.get(normalize_symptom(s), -1) for s in symptoms]
+    vector[[i for i in indices if i >= 0]] = 1
+    return vector
+
+@lru_cache(maxsize=4096)
+def _check_symptom(symptom_str: str) -> bool:
+    """Whether a symptom name is recognized (empty names count as recognized)"""
+    norm = normalize_symptom(symptom_str)
+    return not norm or norm in SUPPORTED_SYMPTOMS
 
 def validate_prediction_input(data):
     """
@@ -30,60 +95,27 @@ def validate_prediction_input(data):
         ValueError: If validation fails
     """
     # If symptoms-only mode (list of strings), allow skipping vitals
-    symptoms = data.get('symptoms', [])
-    symptoms_only = isinstance(symptoms, list) and (len(symptoms) > 0) and isinstance(symptoms[0], (str,))
+    symptoms_only = _is_symptoms_only(data)
 
     if not symptoms_only:
-        required_fields = [
-            'age', 'gender', 'weight',
-            'blood_pressure_systolic', 'blood_pressure_diastolic',
-            'glucose', 'cholesterol'
-        ]
         # Check required fields for vitals path
-        for field in required_fields:
+        for field in _REQUIRED_FIELDS:
             if field not in data:
                 raise ValueError(f"Missing required field: {field}")
+        
+        # Validate type and range of each field in one pass
+        for name, lo, hi, message in _FIELD_SPECS:
+            value = data.get(name)
+            if lo is None:
+                if value not in _GENDER_OK:
+                    raise ValueError(message)
+            elif not isinstance(value, (int, float)) or value < lo or value > hi:
+                raise ValueError(message)
     
-    if not symptoms_only:
-        # Validate age
-        age = data.get('age')
-        if not isinstance(age, (int, float)) or age < 0 or age > 150:
-            raise ValueError("Age must be a number between 0 and 150")
-    
-    if not symptoms_only:
-        # Validate gender
-        gender = data.get('gender')
-        if gender not in [0, 1]:
-            raise ValueError("Gender must be 0 (Female) or 1 (Male)")
-    
-    if not symptoms_only:
-        # Validate weight
-        weight = data.get('weight')
-        if not isinstance(weight, (int, float)) or weight < 20 or weight > 300:
-            raise ValueError("Weight must be between 20 and 300 kg")
-    
-    if not symptoms_only:
-        # Validate blood pressure
-        sys_bp = data.get('blood_pressure_systolic')
-        dia_bp = data.get('blood_pressure_diastolic')
-        if not isinstance(sys_bp, (int, float)) or sys_bp < 50 or sys_bp > 250:
-            raise ValueError("Systolic BP must be between 50 and 250")
-        if not isinstance(dia_bp, (int, float)) or dia_bp < 30 or dia_bp > 150:
-            raise ValueError("Diastolic BP must be between 30 and 150")
-    
-    if not symptoms_only:
-        # Validate glucose
-        glucose = data.get('glucose')
-        if not isinstance(glucose, (int, float)) or glucose < 40 or glucose > 400:
-            raise ValueError("Glucose must be between 40 and 400 mg/dL")
-    
-    if not symptoms_only:
-        # Validate cholesterol
-        cholesterol = data.get('cholesterol')
-        if not isinstance(cholesterol, (int, float)) or cholesterol < 50 or cholesterol > 500:
-            raise ValueError("Cholesterol must be between 50 and 500 mg/dL")
-    
-    symptoms = data.get('symptoms', [])
+    _validate_symptoms(data.get('symptoms', []))
+
+def _validate_symptoms(symptoms):
+    """Validate the symptoms field and log unrecognized names"""
     if symptoms:
         if not isinstance(symptoms, list):
             raise ValueError("Symptoms must be a list")
@@ -93,16 +125,9 @@ def validate_prediction_input(data):
         if not all(isinstance(s, (int, float, str)) for s in symptoms):
             raise ValueError("Each symptom must be a string or 0/1")
         
-        unrecognized = []
-        for s in symptoms:
-            if isinstance(s, str):
-                norm = normalize_symptom(s)
-                if norm and norm not in SUPPORTED_SYMPTOMS:
-                    unrecognized.append(s)
+        unrecognized = [s for s in symptoms if isinstance(s, str) and not _check_symptom(s)]
         
         if unrecognized:
-            import logging
-            logger = logging.getLogger(__name__)
             logger.warning(f"Unrecognized symptoms: {unrecognized}. Model may have lower accuracy.")
 
 def validate_batch_input(predictions):
@@ -124,8 +149,27 @@ def validate_batch_input(predictions):
     if len(predictions) > 100:
         raise ValueError("Maximum 100 predictions per batch")
     
+    # Check every vitals record in one vectorized pass over an (N, fields) matrix;
+    # missing/non-numeric values become NaN. Only offending records go through the
+    # per-field validator, which raises the precise error message.
+    n, n_fields = len(predictions), len(_REQUIRED_FIELDS)
+    records = [pred if isinstance(pred, dict) else {} for pred in predictions]
+    vitals_mask = np.fromiter((not _is_symptoms_only(rec) for rec in records), dtype=bool, count=n)
+    arr = np.fromiter(
+        (_as_number(rec.get(field)) for rec in records for field in _REQUIRED_FIELDS),
+        dtype=np.float64,
+        count=n * n_fields
+    ).reshape(n, n_fields)
+    bad = np.isnan(arr) | (arr < _FIELD_LO) | (arr > _FIELD_HI)
+    bad[:, _GENDER_COL] |= ~np.isin(arr[:, _GENDER_COL], _GENDER_OK)
+    # Symptoms-only records skip vitals checks; non-dict records are all-NaN and always flagged
+    suspect = set(np.flatnonzero(bad.any(axis=1) & vitals_mask).tolist())
+    
     for i, pred in enumerate(predictions):
         try:
-            validate_prediction_input(pred)
+            if i in suspect:
+                validate_prediction_input(pred)
+            else:
+                _validate_symptoms(pred.get('symptoms', []))
         except ValueError as e:
             raise ValueError(f"Prediction {i}: {str(e)}")
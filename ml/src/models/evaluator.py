@@ -7,25 +7,54 @@ import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    roc_auc_score, confusion_matrix, classification_report,
+    precision_recall_fscore_support, roc_auc_score, confusion_matrix,
     roc_curve, precision_recall_curve
 )
+from sklearn.utils.multiclass import unique_labels
 from pathlib import Path
+import hashlib
 import json
+import threading
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bump when the drawing code changes so plots cached under the old look are redrawn
+PLOT_STYLE_VERSION = 1
+
 class ModelEvaluator:
     """Comprehensive model evaluation with visualizations"""
     
-    def __init__(self, output_dir='models/evaluations'):
+    def __init__(self, output_dir='models/evaluations', dpi=150):
         self.output_dir = Path(output_dir)
+        self.dpi = dpi
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.results = {}
+        # One canvas reused by every metric plot (cleared between plots)
+        self._fig = Figure(figsize=(10, 8))
+        self._ax = self._fig.add_subplot()
+        # evaluate_model may run from several threads; plots share the canvas above
+        self._plot_lock = threading.Lock()
         
+    def _new_plot(self, figsize=(10, 8)):
+        """Clear the shared figure and return a fresh axes sized to figsize"""
+        self._fig.clf()
+        self._fig.set_size_inches(*figsize)
+        self._ax = self._fig.add_subplot()
+        return self._ax
+    
+    def _save_plot(self, filename):
+        """Lay out and write the shared figure"""
+        self._fig.tight_layout()
+        self._fig.savefig(filename, dpi=self.dpi, bbox_inches='tight')
+    
     def evaluate_model(self, model, X_test, y_test, model_name, y_train=None):
         """
         Comprehensive model evaluation
@@ -40,39 +69,52 @@ class ModelEvaluator:
         # Predictions
         y_pred = model.predict(X_test)
         
+        # Class set and one-vs-rest indicator matrix, shared by metrics and plots
+        y_test = np.asarray(y_test)
+        classes = np.unique(y_test)
+        Y_bin = (y_test.reshape(-1, 1) == classes.reshape(1, -1)).astype(np.int8)
+        
         # Probabilities (if available)
         y_pred_proba = None
+        proba_columns = None
         if hasattr(model, 'predict_proba'):
             try:
                 y_pred_proba = model.predict_proba(X_test)
+                # predict_proba columns follow model.classes_, which may hold classes
+                # the test split lacks; map each test class to its column
+                proba_columns = self._proba_columns(getattr(model, 'classes_', None), classes, y_pred_proba)
             except Exception:
-                pass
+                y_pred_proba = None
+        
+        # Per-class scores in one pass; weighted averages and the report derive from them
+        labels = unique_labels(y_test, y_pred)
+        precision, recall, f1, support = precision_recall_fscore_support(
+            y_test, y_pred, labels=labels, average=None, zero_division=0
+        )
+        accuracy = np.mean(y_pred == y_test)
         
-        # Calculate metrics
+        # Calculate metrics (NumPy float64 scalars serialize as JSON floats)
         metrics = {
-            'accuracy': float(accuracy_score(y_test, y_pred)),
-            'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
-            'recall': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
-            'f1_score': float(f1_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'accuracy': accuracy,
+            'precision': np.average(precision, weights=support),
+            'recall': np.average(recall, weights=support),
+            'f1_score': np.average(f1, weights=support),
         }
         
-        # ROC-AUC (for binary and multiclass)
-        try:
-            if y_pred_proba is not None:
-                if len(np.unique(y_test)) == 2:
-                    # Binary classification
-                    metrics['roc_auc'] = float(roc_auc_score(y_test, y_pred_proba[:, 1]))
-                else:
-                    # Multiclass classification
-                    metrics['roc_auc'] = float(roc_auc_score(
-                        y_test, y_pred_proba, 
-                        average='weighted', 
-                        multi_class='ovr'
-                    ))
-            else:
-                metrics['roc_auc'] = 0.0
-        except Exception:
-            metrics['roc_auc'] = 0.0
+        # ROC-AUC (for binary and multiclass): one-vs-rest AUC per plotted column,
+        # computed once and shared with the ROC plot
+        roc_aucs = None
+        metrics['roc_auc'] = 0.0
+        if y_pred_proba is not None:
+            rows, columns, _ = self._curve_columns(classes, proba_columns, None)
+            try:
+                roc_aucs = np.atleast_1d(roc_auc_score(Y_bin[:, rows], y_pred_proba[:, columns], average=None))
+            except Exception:
+                roc_aucs = None
+            # Multiclass OvR needs one probability column per test class
+            if roc_aucs is not None and (len(classes) == 2 or y_pred_proba.shape[1] == len(classes)):
+                # Support-weighted mean, as roc_auc_score(average='weighted', multi_class='ovr')
+                metrics['roc_auc'] = np.average(roc_aucs, weights=Y_bin[:, rows].sum(axis=0))
         
         # Confusion matrix
         cm = confusion_matrix(y_test, y_pred)
@@ -80,103 +122,177 @@ class ModelEvaluator:
         
         # Classification report
         try:
-            report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
+            report = self._classification_report(labels, precision, recall, f1, support, accuracy)
             metrics['classification_report'] = report
         except Exception:
             metrics['classification_report'] = {}
         
-        self.results[model_name] = metrics
-        
-        # Generate visualizations
-        self._plot_confusion_matrix(cm, model_name, y_test)
-        if y_pred_proba is not None:
-            self._plot_roc_curve(y_test, y_pred_proba, model_name)
-            self._plot_precision_recall_curve(y_test, y_pred_proba, model_name)
+        # Generate visualizations (one model at a time on the shared figure)
+        with self._plot_lock:
+            self.results[model_name] = metrics
+            self._plot_confusion_matrix(cm, model_name, classes)
+            if y_pred_proba is not None:
+                if roc_aucs is not None:
+                    self._plot_roc_curve(Y_bin, classes, y_pred_proba, proba_columns, roc_aucs, model_name)
+                self._plot_precision_recall_curve(Y_bin, classes, y_pred_proba, proba_columns, model_name)
         
         return metrics
     
-    def _plot_confusion_matrix(self, cm, model_name, y_test):
+    def _plot_path(self, model_name, kind, *arrays, labels=()):
+        """
+        Output path for a plot, keyed by a hash of the data it is drawn from
+        and the settings it is drawn with (kind, legend labels, dpi, style)
+        
+        Re-evaluating with identical inputs maps to an existing file, which the
+        plotters reuse instead of rendering again.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((PLOT_STYLE_VERSION, kind, self.dpi, [str(label) for label in labels])).encode())
+        for arr in arrays:
+            arr = np.ascontiguousarray(arr)
+            digest.update(str((arr.dtype, arr.shape)).encode())
+            digest.update(arr.tobytes())
+        return self.output_dir / f'{model_name}_{kind}_{digest.hexdigest()}.png'
+    
+    def _remove_stale_plots(self, filename):
+        """Delete hash-keyed versions of this plot drawn from other data than filename"""
+        prefix = filename.name[:-len('.png') - 32]
+        for old in self.output_dir.glob(prefix + '[0-9a-f]' * 32 + '.png'):
+            if old != filename:
+                old.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _classification_report(labels, precision, recall, f1, support, accuracy):
+        """Build classification_report(output_dict=True) from per-class scores"""
+        report = {
+            str(label): {
+                'precision': float(p), 'recall': float(r), 'f1-score': float(f), 'support': int(s)
+            }
+            for label, p, r, f, s in zip(labels, precision, recall, f1, support)
+        }
+        total = int(support.sum())
+        report['accuracy'] = accuracy
+        report['macro avg'] = {
+            'precision': float(np.mean(precision)),
+            'recall': float(np.mean(recall)),
+            'f1-score': float(np.mean(f1)),
+            'support': total
+        }
+        report['weighted avg'] = {
+            'precision': float(np.average(precision, weights=support)),
+            'recall': float(np.average(recall, weights=support)),
+            'f1-score': float(np.average(f1, weights=support)),
+            'support': total
+        }
+        return report
+    
+    def _plot_confusion_matrix(self, cm, model_name, classes):
         """Plot confusion matrix heatmap"""
-        plt.figure(figsize=(10, 8))
+        filename = self._plot_path(model_name, 'confusion_matrix', cm, classes)
+        self._remove_stale_plots(filename)
+        if filename.exists():
+            print(f"  ✓ Confusion matrix up to date: {filename}")
+            return
+        
+        ax = self._new_plot()
         sns.heatmap(
             cm, 
             annot=True, 
             fmt='d', 
             cmap='Blues',
-            xticklabels=sorted(np.unique(y_test)),
-            yticklabels=sorted(np.unique(y_test))
+            xticklabels=classes,
+            yticklabels=classes,
+            ax=ax
         )
-        plt.title(f'Confusion Matrix - {model_name}', fontsize=14, fontweight='bold')
-        plt.ylabel('True Label', fontsize=12)
-        plt.xlabel('Predicted Label', fontsize=12)
-        plt.tight_layout()
-        
-        filename = self.output_dir / f'{model_name}_confusion_matrix.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        ax.set_title(f'Confusion Matrix - {model_name}', fontsize=14, fontweight='bold')
+        ax.set_ylabel('True Label', fontsize=12)
+        ax.set_xlabel('Predicted Label', fontsize=12)
+        
+        self._save_plot(filename)
         print(f"  ✓ Saved confusion matrix: {filename}")
     
-    def _plot_roc_curve(self, y_test, y_pred_proba, model_name):
-        """Plot ROC curve(s)"""
-        plt.figure(figsize=(10, 8))
-        
-        if len(np.unique(y_test)) == 2:
-            # Binary classification
-            fpr, tpr, _ = roc_curve(y_test, y_pred_proba[:, 1])
-            roc_auc = roc_auc_score(y_test, y_pred_proba[:, 1])
-            plt.plot(fpr, tpr, label=f'ROC curve (AUC = {roc_auc:.2f})', linewidth=2)
+    @staticmethod
+    def _proba_columns(model_classes, classes, y_pred_proba):
+        """
+        predict_proba column of each test class, or -1 if the model never saw it
+        
+        Models without classes_ are assumed to emit one column per label 0..k-1.
+        """
+        if model_classes is None:
+            model_classes = np.arange(y_pred_proba.shape[1])
+        model_classes = np.asarray(model_classes)
+        # classes_ is sorted (np.unique order), so a binary search finds each class
+        pos = np.minimum(np.searchsorted(model_classes, classes), len(model_classes) - 1)
+        return np.where(model_classes[pos] == classes, pos, -1)
+    
+    @staticmethod
+    def _curve_columns(classes, proba_columns, binary_label):
+        """
+        Curves to draw as (Y_bin columns, predict_proba columns, legend labels)
+        
+        Binary problems plot only the positive class; multiclass plots one
+        one-vs-rest curve per class. Test classes without a probability
+        column are left out.
+        """
+        if len(classes) == 2:
+            curves = [(1, binary_label)]
         else:
-            # Multiclass classification
-            n_classes = len(np.unique(y_test))
-            for i in range(n_classes):
-                y_binary = (y_test == i).astype(int)
-                if len(np.unique(y_binary)) > 1:
-                    fpr, tpr, _ = roc_curve(y_binary, y_pred_proba[:, i])
-                    roc_auc = roc_auc_score(y_binary, y_pred_proba[:, i])
-                    plt.plot(fpr, tpr, label=f'Class {i} (AUC = {roc_auc:.2f})', linewidth=2)
-        
-        plt.plot([0, 1], [0, 1], 'k--', label='Random', linewidth=1)
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('False Positive Rate', fontsize=12)
-        plt.ylabel('True Positive Rate', fontsize=12)
-        plt.title(f'ROC Curve - {model_name}', fontsize=14, fontweight='bold')
-        plt.legend(loc="lower right", fontsize=10)
-        plt.grid(alpha=0.3)
-        plt.tight_layout()
-        
-        filename = self.output_dir / f'{model_name}_roc_curve.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+            curves = [(i, f'Class {c}') for i, c in enumerate(classes)]
+        curves = [(i, proba_columns[i], label) for i, label in curves if proba_columns[i] >= 0]
+        rows = [i for i, _, _ in curves]
+        columns = [j for _, j, _ in curves]
+        labels = [label for _, _, label in curves]
+        return rows, columns, labels
+    
+    def _plot_roc_curve(self, Y_bin, classes, y_pred_proba, proba_columns, roc_aucs, model_name):
+        """Plot ROC curve(s), labelled with the AUCs computed in evaluate_model"""
+        rows, columns, labels = self._curve_columns(classes, proba_columns, 'ROC curve')
+        filename = self._plot_path(model_name, 'roc_curve', Y_bin, y_pred_proba, proba_columns, labels=labels)
+        self._remove_stale_plots(filename)
+        if filename.exists():
+            print(f"  ✓ ROC curve up to date: {filename}")
+            return
+        
+        ax = self._new_plot()
+        
+        for i, j, label, roc_auc in zip(rows, columns, labels, roc_aucs):
+            fpr, tpr, _ = roc_curve(Y_bin[:, i], y_pred_proba[:, j])
+            ax.plot(fpr, tpr, label=f'{label} (AUC = {roc_auc:.2f})', linewidth=2)
+        
+        ax.plot([0, 1], [0, 1], 'k--', label='Random', linewidth=1)
+        ax.set_xlim([0.0, 1.0])
+        ax.set_ylim([0.0, 1.05])
+        ax.set_xlabel('False Positive Rate', fontsize=12)
+        ax.set_ylabel('True Positive Rate', fontsize=12)
+        ax.set_title(f'ROC Curve - {model_name}', fontsize=14, fontweight='bold')
+        ax.legend(loc="lower right", fontsize=10)
+        ax.grid(alpha=0.3)
+        
+        self._save_plot(filename)
         print(f"  ✓ Saved ROC curve: {filename}")
     
-    def _plot_precision_recall_curve(self, y_test, y_pred_proba, model_name):
+    def _plot_precision_recall_curve(self, Y_bin, classes, y_pred_proba, proba_columns, model_name):
         """Plot Precision-Recall curve"""
-        plt.figure(figsize=(10, 8))
+        rows, columns, labels = self._curve_columns(classes, proba_columns, 'Precision-Recall curve')
+        filename = self._plot_path(model_name, 'precision_recall', Y_bin, y_pred_proba, proba_columns, labels=labels)
+        self._remove_stale_plots(filename)
+        if filename.exists():
+            print(f"  ✓ Precision-Recall curve up to date: {filename}")
+            return
         
-        if len(np.unique(y_test)) == 2:
-            # Binary classification
-            precision, recall, _ = precision_recall_curve(y_test, y_pred_proba[:, 1])
-            plt.plot(recall, precision, label='Precision-Recall curve', linewidth=2)
-        else:
-            # Multiclass - plot for each class
-            n_classes = len(np.unique(y_test))
-            for i in range(n_classes):
-                y_binary = (y_test == i).astype(int)
-                if len(np.unique(y_binary)) > 1:
-                    precision, recall, _ = precision_recall_curve(y_binary, y_pred_proba[:, i])
-                    plt.plot(recall, precision, label=f'Class {i}', linewidth=2)
-        
-        plt.xlabel('Recall', fontsize=12)
-        plt.ylabel('Precision', fontsize=12)
-        plt.title(f'Precision-Recall Curve - {model_name}', fontsize=14, fontweight='bold')
-        plt.legend(loc="lower left", fontsize=10)
-        plt.grid(alpha=0.3)
-        plt.tight_layout()
-        
-        filename = self.output_dir / f'{model_name}_precision_recall.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        ax = self._new_plot()
+        
+        for i, j, label in zip(rows, columns, labels):
+            precision, recall, _ = precision_recall_curve(Y_bin[:, i], y_pred_proba[:, j])
+            ax.plot(recall, precision, label=label, linewidth=2)
+        
+        ax.set_xlabel('Recall', fontsize=12)
+        ax.set_ylabel('Precision', fontsize=12)
+        ax.set_title(f'Precision-Recall Curve - {model_name}', fontsize=14, fontweight='bold')
+        ax.legend(loc="lower left", fontsize=10)
+        ax.grid(alpha=0.3)
+        
+        self._save_plot(filename)
         print(f"  ✓ Saved Precision-Recall curve: {filename}")
     
     def plot_model_comparison(self):
@@ -194,7 +310,7 @@ class ModelEvaluator:
         
         comparison_array = np.array(comparison_data)
         
-        plt.figure(figsize=(12, 8))
+        ax = self._new_plot(figsize=(12, 8))
         sns.heatmap(
             comparison_array,
             annot=True,
@@ -202,16 +318,15 @@ class ModelEvaluator:
             cmap='YlOrRd',
             xticklabels=metrics,
             yticklabels=models,
-            cbar_kws={'label': 'Score'}
+            cbar_kws={'label': 'Score'},
+            ax=ax
         )
-        plt.title('Model Comparison - Performance Metrics', fontsize=14, fontweight='bold')
-        plt.ylabel('Model', fontsize=12)
-        plt.xlabel('Metric', fontsize=12)
-        plt.tight_layout()
+        ax.set_title('Model Comparison - Performance Metrics', fontsize=14, fontweight='bold')
+        ax.set_ylabel('Model', fontsize=12)
+        ax.set_xlabel('Metric', fontsize=12)
         
         filename = self.output_dir / 'model_comparison_heatmap.png'
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_plot(filename)
         print(f"  ✓ Saved model comparison: {filename}")
     
     def explain_with_shap(self, model, X_sample, feature_names=None, model_name='model'):
@@ -245,7 +360,7 @@ class ModelEvaluator:
             plt.tight_layout()
             
             filename = self.output_dir / f'{model_name}_shap_summary.png'
-            plt.savefig(filename, dpi=300, bbox_inches='tight')
+            plt.savefig(filename, dpi=self.dpi, bbox_inches='tight')
             plt.close()
             print(f"  ✓ Saved SHAP summary: {filename}")
             
@@ -290,7 +405,7 @@ class ModelEvaluator:
             # Save explanation as image
             fig = explanation.as_pyplot_figure()
             filename = self.output_dir / f'{model_name}_lime_explanation.png'
-            fig.savefig(filename, dpi=300, bbox_inches='tight')
+            fig.savefig(filename, dpi=self.dpi, bbox_inches='tight')
             plt.close(fig)
             print(f"  ✓ Saved LIME explanation: {filename}")
             
@@ -305,8 +420,12 @@ class ModelEvaluator:
     def save_results(self, filename='evaluation_results.json'):
         """Save evaluation results to JSON"""
         filepath = self.output_dir / filename
-        with open(filepath, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(self.results, f, indent=2)
         print(f"  ✓ Saved evaluation results: {filepath}")
     
     def print_summary(self):
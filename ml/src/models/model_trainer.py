@@ -1,9 +1,14 @@
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.svm import SVC
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.svm import SVC, LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
 import joblib
+from joblib import Parallel, delayed
+
+# Training sets above this many rows get the cheaper model configurations
+LARGE_DATASET_ROWS = 10_000
 
 class ModelTrainer:
     """Train and evaluate ML models"""
@@ -20,26 +25,67 @@ class ModelTrainer:
         return model
     
     def train_random_forest(self, X_train, y_train):
-        """Train Random Forest model"""
-        model = RandomForestClassifier(n_estimators=100, max_depth=15, random_state=42)
+        """Train Random Forest model (trees are fit in parallel on all cores)"""
+        # On large datasets each tree bootstraps half the rows
+        max_samples = 0.5 if len(X_train) > LARGE_DATASET_ROWS else None
+        model = RandomForestClassifier(
+            n_estimators=100, max_depth=15, max_features='sqrt',
+            bootstrap=True, max_samples=max_samples, n_jobs=-1, random_state=42
+        )
         model.fit(X_train, y_train)
         self.models['random_forest'] = model
         return model
     
     def train_svm(self, X_train, y_train):
-        """Train SVM model"""
-        model = SVC(kernel='rbf', probability=True, random_state=42)
+        """Train SVM model (linear and calibrated on large datasets)"""
+        # 3-fold calibration needs three rows of every class
+        can_calibrate = np.unique(y_train, return_counts=True)[1].min() >= 3
+        if len(X_train) > LARGE_DATASET_ROWS and can_calibrate:
+            # RBF SVC scales superlinearly with rows; the primal linear solve does not
+            model = CalibratedClassifierCV(LinearSVC(dual=False, random_state=42), cv=3, n_jobs=-1)
+        else:
+            model = SVC(kernel='rbf', probability=True, random_state=42, cache_size=1000)
         model.fit(X_train, y_train)
         self.models['svm'] = model
         return model
     
     def train_gradient_boosting(self, X_train, y_train):
-        """Train Gradient Boosting model"""
-        model = GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=42)
+        """Train Gradient Boosting model (histogram-based, multithreaded)"""
+        # Early stopping holds out a stratified validation split (two rows per class)
+        early_stopping = bool(np.unique(y_train, return_counts=True)[1].min() >= 2)
+        model = HistGradientBoostingClassifier(
+            max_iter=100, learning_rate=0.1, max_bins=255, early_stopping=early_stopping, random_state=42
+        )
         model.fit(X_train, y_train)
         self.models['gradient_boosting'] = model
         return model
     
+    def train_all(self, X_train, y_train, n_jobs=4):
+        """
+        Train all models concurrently, one worker process per model
+        
+        Args:
+            X_train: Training features
+            y_train: Training labels
+            n_jobs: Number of worker processes
+            
+        Returns:
+            Dictionary of trained models by name
+        """
+        trainers = {
+            'decision_tree': self.train_decision_tree,
+            'random_forest': self.train_random_forest,
+            'svm': self.train_svm,
+            'gradient_boosting': self.train_gradient_boosting,
+        }
+        # Models are fit in worker processes, so register the returned copies here;
+        # loky caps each worker's inner threads to avoid oversubscribing the cores
+        fitted = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(train)(X_train, y_train) for train in trainers.values()
+        )
+        self.models.update(zip(trainers, fitted))
+        return self.models
+    
     def evaluate_model(self, model, X_test, y_test, model_name):
         """Evaluate model performance"""
         y_pred = model.predict(X_test)
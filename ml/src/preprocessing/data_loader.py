@@ -1,8 +1,54 @@
+import os
+import logging
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 
+logger = logging.getLogger(__name__)
+
+# Binary symptom indicators need one byte per cell, not eight
+SYMPTOM_DTYPE = np.uint8
+
+# Accepted MEDIPREDICT_CSV_ENGINE values
+_CSV_ENGINES = ('pyarrow', 'polars', 'c', 'python')
+
+def _read_csv(filepath, nrows=None):
+    """
+    Read a CSV with the parser named by MEDIPREDICT_CSV_ENGINE
+    
+    'pyarrow' (default) uses pandas' multithreaded Arrow parser, 'polars' reads
+    with Polars and converts to pandas, and 'c'/'python' select those pandas
+    engines. Missing optional packages, files PyArrow or Polars cannot parse,
+    and unknown engine names (with a warning) fall back to the C engine.
+    """
+    engine = os.getenv('MEDIPREDICT_CSV_ENGINE', 'pyarrow').lower()
+    if engine not in _CSV_ENGINES:
+        logger.warning(f"Unknown MEDIPREDICT_CSV_ENGINE {engine!r} (expected one of {', '.join(_CSV_ENGINES)}); using the C engine")
+        engine = 'c'
+    if engine == 'polars':
+        try:
+            import polars as pl
+            return pl.read_csv(filepath, n_rows=nrows).to_pandas()
+        except ImportError:
+            pass
+        except Exception as e:
+            # Polars parse errors do not share a base class with pandas'
+            logger.warning(f"Polars could not parse {filepath} ({e}); retrying with the C engine")
+    # The pyarrow engine does not support nrows, so row-capped reads use the C engine
+    if engine == 'pyarrow' and nrows is None:
+        try:
+            return pd.read_csv(filepath, engine='pyarrow')
+        except ImportError:
+            pass
+        except ValueError as e:
+            # Arrow rejects some files the C parser accepts (ragged or oddly quoted
+            # rows); ArrowInvalid and pandas' ParserError both derive from ValueError
+            logger.warning(f"PyArrow could not parse {filepath} ({e}); retrying with the C engine")
+    if engine not in ('c', 'python'):
+        engine = 'c'
+    return pd.read_csv(filepath, nrows=nrows, engine=engine)
+
 class DataLoader:
     """Load and preprocess health datasets"""
     
@@ -12,7 +58,7 @@ class DataLoader:
     
     def load_heart_disease_data(self, filepath):
         """Load heart disease dataset"""
-        df = pd.read_csv(filepath)
+        df = _read_csv(filepath)
         
         # Handle missing values
         df = df.dropna()
@@ -25,10 +71,10 @@ class DataLoader:
     
     def load_stroke_data(self, filepath):
         """Load stroke prediction dataset"""
-        df = pd.read_csv(filepath)
+        df = _read_csv(filepath)
         
-        # Handle missing values
-        df['bmi'].fillna(df['bmi'].mean(), inplace=True)
+        # Handle missing values (assign back; in-place fillna on a column is deprecated)
+        df['bmi'] = df['bmi'].fillna(df['bmi'].mean())
         
         # Remove rows with missing target
         df = df.dropna(subset=['stroke'])
@@ -40,7 +86,7 @@ class DataLoader:
     
     def load_parkinsons_data(self, filepath):
         """Load Parkinson's dataset"""
-        df = pd.read_csv(filepath)
+        df = _read_csv(filepath)
         
         X = df.drop(['name', 'status'], axis=1)
         y = df['status']
@@ -51,6 +97,10 @@ class DataLoader:
         """
         Load Diseases and Symptoms Dataset from Kaggle
         This dataset contains disease-symptom relationships
+        
+        Returns:
+            X: 0/1 symptom indicators as a SYMPTOM_DTYPE (uint8) DataFrame
+            y: Encoded disease labels
         """
         nrows_env = None
         try:
@@ -58,7 +108,7 @@ class DataLoader:
             nrows_env = int(os.getenv('FAST_TRAIN_NROWS', '0'))
         except Exception:
             nrows_env = None
-        df = pd.read_csv(filepath, nrows=(nrows_env if nrows_env and nrows_env > 0 else None))
+        df = _read_csv(filepath, nrows=(nrows_env if nrows_env and nrows_env > 0 else None))
         
         # Handle missing values
         df = df.dropna()
@@ -77,15 +127,19 @@ class DataLoader:
             # Get symptom columns (all except Disease)
             X = df.drop(target_col, axis=1)
             
-            # Normalize symptom indicators to binary (0/1)
-            for col in X.columns:
-                if X[col].dtype == 'object':
-                    X[col] = X[col].astype(str).str.strip().str.lower()
-                    X[col] = X[col].isin(['yes', '1', 'true']).astype(int)
-                else:
-                    # Treat any non-zero numeric as 1
-                    X[col] = (X[col].astype(float) > 0).astype(int)
-            
+            # Normalize symptom indicators to binary (0/1), one block at a time
+            num_mask = np.array([pd.api.types.is_numeric_dtype(dt) for dt in X.dtypes], dtype=bool)
+            binary = np.empty(X.shape, dtype=SYMPTOM_DTYPE)
+            if num_mask.any():
+                # Treat any non-zero numeric as 1
+                binary[:, num_mask] = X.loc[:, num_mask].to_numpy(dtype=np.float32) > 0
+            if not num_mask.all():
+                # Text indicators: normalize all cells in a single pass
+                text = X.loc[:, ~num_mask].to_numpy(dtype=object)
+                flags = pd.Series(text.ravel()).astype(str).str.strip().str.lower().isin({'yes', '1', 'true'})
+                binary[:, ~num_mask] = flags.to_numpy().reshape(text.shape)
+            X = pd.DataFrame(binary, index=X.index, columns=X.columns, copy=False)
+
             return X, y
         
         return None, None
@@ -101,7 +155,7 @@ class DataLoader:
             nrows_env = int(os.getenv('FAST_TRAIN_NROWS', '0'))
         except Exception:
             nrows_env = None
-        df = pd.read_csv(filepath, nrows=(nrows_env if nrows_env and nrows_env > 0 else None))
+        df = _read_csv(filepath, nrows=(nrows_env if nrows_env and nrows_env > 0 else None))
         
         # Common target column names
         target_cols = ['Disease', 'disease', 'target', 'diagnosis', 'condition', 
@@ -133,17 +187,30 @@ class DataLoader:
     def preprocess_features(self, X, y=None, fit=True):
         """
         Preprocess features: encoding, scaling, feature selection
+        
+        Returns:
+            Scaled float32 feature matrix (ndarray)
         """
-        X_processed = X.copy()
-        
-        # Encode categorical variables
-        categorical_cols = X_processed.select_dtypes(include=['object']).columns
-        for col in categorical_cols:
-            if fit:
-                self.label_encoders[col] = LabelEncoder()
-                X_processed[col] = self.label_encoders[col].fit_transform(X_processed[col])
-            else:
-                X_processed[col] = self.label_encoders[col].transform(X_processed[col])
+        # Encode categorical variables as category codes (sorted categories, like
+        # LabelEncoder); the fitted categories are kept for the transform path,
+        # where unseen values map to -1
+        categorical_cols = set(X.select_dtypes(include=['object']).columns)
+        if not categorical_cols:
+            # All-numeric frames (e.g. the symptom matrix) convert in one pass
+            X_processed = X.to_numpy(dtype=np.float32)
+        else:
+            # Fill a float32 matrix column by column instead of copying the frame
+            X_processed = np.empty(X.shape, dtype=np.float32)
+            for j, col in enumerate(X.columns):
+                if col not in categorical_cols:
+                    X_processed[:, j] = X[col].to_numpy()
+                    continue
+                if fit:
+                    cat = pd.Categorical(X[col])
+                    self.label_encoders[col] = cat.categories
+                else:
+                    cat = pd.Categorical(X[col], categories=self.label_encoders[col])
+                X_processed[:, j] = cat.codes
         
         # Scale numerical features
         if fit:
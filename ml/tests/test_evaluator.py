@@ -0,0 +1,71 @@
+"""
+Tests for ModelEvaluator's ROC-AUC computation
+Run from ml/: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.evaluator import ModelEvaluator
+
+class TestEvaluatorClassAlignment(unittest.TestCase):
+    """Per-class AUCs must use the predict_proba column of each test class"""
+
+    def setUp(self):
+        X, y = make_classification(1500, 10, n_informative=6, n_classes=5, random_state=0)
+        self.model = RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0).fit(X[:1000], y[:1000])
+        self.X_test, self.y_test = X[1000:], y[1000:]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.evaluator = ModelEvaluator(output_dir=self.tmp.name, dpi=50)
+        # Capture the per-class AUCs handed to the ROC plot
+        self.plotted = {}
+        self.evaluator._plot_roc_curve = lambda Y_bin, classes, *args: self.plotted.update(
+            classes=classes, roc_aucs=args[-2]
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _subset(self, labels):
+        keep = np.isin(self.y_test, labels)
+        return self.X_test[keep], self.y_test[keep]
+
+    def test_test_split_missing_training_classes(self):
+        X_test, y_test = self._subset([0, 2, 4])
+        proba = self.model.predict_proba(X_test)
+        expected = [roc_auc_score(y_test == c, proba[:, c]) for c in (0, 2, 4)]
+
+        metrics = self.evaluator.evaluate_model(self.model, X_test, y_test, 'rf')
+
+        np.testing.assert_array_equal(self.plotted['classes'], [0, 2, 4])
+        np.testing.assert_allclose(self.plotted['roc_aucs'], expected)
+        # Like roc_auc_score(multi_class='ovr'), no averaged AUC when columns and classes differ
+        self.assertEqual(metrics['roc_auc'], 0.0)
+
+    def test_binary_test_split_of_multiclass_model(self):
+        X_test, y_test = self._subset([1, 3])
+        proba = self.model.predict_proba(X_test)
+
+        metrics = self.evaluator.evaluate_model(self.model, X_test, y_test, 'rf')
+
+        self.assertAlmostEqual(metrics['roc_auc'], roc_auc_score(y_test == 3, proba[:, 3]))
+
+    def test_all_classes_present(self):
+        proba = self.model.predict_proba(self.X_test)
+
+        metrics = self.evaluator.evaluate_model(self.model, self.X_test, self.y_test, 'rf')
+
+        expected = roc_auc_score(self.y_test, proba, multi_class='ovr', average='weighted')
+        self.assertAlmostEqual(metrics['roc_auc'], expected)
+
+if __name__ == '__main__':
+    unittest.main()
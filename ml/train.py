@@ -9,17 +9,41 @@ import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
+
+# Optional Intel oneDAL acceleration (opt-in with USE_SKLEARNEX=1): patching must
+# happen before the sklearn estimators are imported. Models fit while patched
+# pickle as sklearnex classes, so the API environment then needs sklearnex too.
+if os.getenv('USE_SKLEARNEX', '0') == '1':
+    try:
+        from sklearnex import patch_sklearn
+        patch_sklearn()
+    except ImportError:
+        pass
+
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
+from sklearn.utils import Bunch
+from sklearn.model_selection import train_test_split, StratifiedShuffleSplit
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, ExtraTreesClassifier
-from sklearn.svm import SVC
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier, ExtraTreesClassifier
+from sklearn.svm import SVC, LinearSVC
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.linear_model import LogisticRegression
 from sklearn.linear_model import SGDClassifier
 from sklearn.ensemble import VotingClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
+from sklearn.metrics import precision_recall_fscore_support, confusion_matrix
+from scipy import sparse
 import joblib
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
 import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+try:
+    import lz4  # joblib's 'lz4' codec needs the package installed
+except ImportError:
+    lz4 = None
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -27,6 +51,222 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from preprocessing.data_loader import DataLoader
 from models.evaluator import ModelEvaluator
 
+# Bump when loading/preprocessing changes so stale cached matrices are ignored
+PREPROCESS_CACHE_VERSION = 1
+# Settings that change what the preprocessed matrix contains
+_PREPROCESS_ENV = ('FAST_TRAIN', 'TRAIN_ROWS', 'FAST_TRAIN_NROWS', 'DOWNCAST_FP32', 'MEDIPREDICT_CSV_ENGINE')
+
+def _dump_artifact(obj, path):
+    """
+    Write a model artifact for the API
+    
+    Plain pickles by default, which the API memory-maps so preloaded Gunicorn
+    workers share them; MODEL_COMPRESS=1 writes smaller LZ4-compressed files
+    (when lz4 is installed) that each worker loads into its own memory.
+    """
+    compress = ('lz4', 3) if lz4 is not None and os.getenv('MODEL_COMPRESS', '0') == '1' else 0
+    joblib.dump(obj, str(path), compress=compress)
+
+def _preprocess_cache_path():
+    """
+    Cache file for the preprocessed training data, or None when caching is off
+    
+    The key covers every dataset file (name, size, mtime), the cache version and
+    the environment settings that affect loading and preprocessing.
+    """
+    if os.getenv('PREPROCESS_CACHE', '1') != '1':
+        return None
+    base_dir = Path(__file__).parent
+    csv_files = sorted((base_dir / 'data').glob('*.csv'))
+    if not csv_files:
+        return None
+    parts = [f"v{PREPROCESS_CACHE_VERSION}"]
+    parts += [f"{p.name}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in csv_files]
+    parts += [f"{name}={os.getenv(name, '')}" for name in _PREPROCESS_ENV]
+    key = hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+    return base_dir / 'models' / 'cache' / f'preproc_{key}.joblib'
+
+def _load_preprocess_cache(path):
+    """
+    Load cached preprocessing output (arrays are memory-mapped read-only)
+    
+    Returns:
+        (X, X_processed, y, loader) or None on a cache miss; X is an empty frame
+        carrying the original column names
+    """
+    if not path.exists():
+        return None
+    try:
+        cached = joblib.load(str(path), mmap_mode='r')
+        loader = DataLoader()
+        loader.scaler = cached['scaler']
+        loader.label_encoders = cached['label_encoders']
+        X = pd.DataFrame(columns=cached['columns'])
+        return X, cached['X'], cached['y'], loader
+    except Exception as e:
+        print(f"Ignoring unreadable preprocessing cache {path.name}: {e}")
+        return None
+
+def _save_preprocess_cache(path, X, X_processed, y, loader):
+    """Persist preprocessing output for _load_preprocess_cache (best effort)"""
+    try:
+        os.makedirs(path.parent, exist_ok=True)
+        for stale in path.parent.glob('preproc_*.joblib'):
+            stale.unlink()
+        joblib.dump({
+            'X': np.asarray(X_processed),
+            'y': np.asarray(y),
+            'scaler': loader.scaler,
+            'label_encoders': loader.label_encoders,
+            'columns': list(X.columns) if isinstance(X, pd.DataFrame) else [],
+        }, str(path))
+    except Exception as e:
+        print(f"Could not write preprocessing cache: {e}")
+
+def _fit_model(model, X, y, single_threaded=False):
+    """
+    Fit one estimator, reporting failure instead of raising
+    
+    Args:
+        model: Unfitted estimator
+        X: Training features
+        y: Training labels
+        single_threaded: Pin the estimator and native thread pools to one thread
+            (used when several models are fit side by side)
+        
+    Returns:
+        (fitted_model, None) on success, (None, error message) on failure
+    """
+    try:
+        if single_threaded:
+            if 'n_jobs' in model.get_params(deep=False):
+                model.set_params(n_jobs=1)
+            with threadpool_limits(limits=1):
+                model.fit(X, y)
+        else:
+            model.fit(X, y)
+        return model, None
+    except Exception as e:
+        return None, str(e)
+
+def _stratified_subset(X, y, train_size):
+    """
+    Stratified random subset of rows (fraction or row count)
+    
+    Only the kept rows are gathered; the complementary split is never materialized.
+    """
+    sss = StratifiedShuffleSplit(n_splits=1, train_size=train_size, random_state=42)
+    idx, _ = next(sss.split(np.zeros((len(y), 1)), y))
+    if hasattr(X, 'iloc'):
+        X = X.iloc[idx]
+    else:
+        X = X[idx]
+    y = y.iloc[idx] if hasattr(y, 'iloc') else np.asarray(y)[idx]
+    return X, y
+
+def _prefit_soft_voting(voters, y):
+    """
+    Soft VotingClassifier over already-fitted models, without refitting clones
+    
+    The fitted attributes VotingClassifier.fit would set are filled in directly,
+    so predict/predict_proba average the given models' probabilities and the
+    result pickles as a plain scikit-learn estimator.
+    
+    Args:
+        voters: List of (name, fitted model) pairs sharing the same classes_
+        y: Training labels the voters were fit on
+    """
+    ensemble = VotingClassifier(estimators=voters, voting='soft')
+    ensemble.estimators_ = [mdl for _, mdl in voters]
+    ensemble.named_estimators_ = Bunch(**dict(voters))
+    ensemble.le_ = LabelEncoder().fit(y)
+    ensemble.classes_ = ensemble.le_.classes_
+    return ensemble
+
+def _evaluate_one(evaluator, name, model, X_test, y_test, y_train):
+    """
+    Evaluate one fitted model, falling back to basic metrics on failure
+    
+    Returns:
+        Metrics dict for results.json
+    """
+    print(f"\nEvaluating {name}...")
+    try:
+        return evaluator.evaluate_model(model, X_test, y_test, name, y_train)
+    except Exception as e:
+        print(f"  ⚠ Evaluation error: {e}")
+        # Fallback to basic metrics; accuracy is the confusion matrix diagonal
+        y_pred = model.predict(X_test)
+        cm = confusion_matrix(y_test, y_pred)
+        precision, recall, f1, _ = precision_recall_fscore_support(
+            y_test, y_pred, average='weighted', zero_division=0
+        )
+        return {
+            'accuracy': float(cm.trace() / cm.sum()),
+            'precision': float(precision),
+            'recall': float(recall),
+            'f1_score': float(f1),
+            'roc_auc': 0.0,
+            'confusion_matrix': cm.tolist()
+        }
+
+def _explain_model(output_dir, name, model, X_sample, feature_names, shap_on, lime_on):
+    """Write the SHAP/LIME plots for one model (runs in a pool worker)"""
+    evaluator = ModelEvaluator(output_dir=output_dir)
+    # One worker per model; keep BLAS/OpenMP from oversubscribing the cores
+    with threadpool_limits(1):
+        if shap_on:
+            try:
+                evaluator.explain_with_shap(model, X_sample[:50], feature_names, name)
+            except Exception:
+                pass
+        if lime_on:
+            try:
+                evaluator.explain_with_lime(model, X_sample[:10], feature_names, name)
+            except Exception:
+                pass
+
+def _render_evaluation(results, output_dir):
+    """Draw the model comparison chart and write evaluation_results.json (child process)"""
+    evaluator = ModelEvaluator(output_dir=output_dir)
+    evaluator.results = results
+    evaluator.plot_model_comparison()
+    evaluator.save_results()
+
+def _load_one(path_str):
+    """
+    Load one dataset file with the loader matching its name
+    
+    Runs in a worker process, so the loader's fitted label encoders are
+    returned alongside the data.
+    
+    Returns:
+        (X, y, description, label_encoders, error message or None)
+    """
+    loader = DataLoader()
+    name = Path(path_str).name.lower()
+    try:
+        # Try specific loaders first
+        if 'disease' in name or 'symptom' in name:
+            X, y = loader.load_diseases_symptoms_data(path_str)
+            description = "as Diseases and Symptoms dataset"
+        elif 'heart' in name:
+            X, y = loader.load_heart_disease_data(path_str)
+            description = "as Heart Disease dataset"
+        elif 'stroke' in name:
+            X, y = loader.load_stroke_data(path_str)
+            description = "as Stroke dataset"
+        elif 'parkinson' in name:
+            X, y = loader.load_parkinsons_data(path_str)
+            description = "as Parkinson's dataset"
+        else:
+            # Generic loader
+            X, y = loader.load_kaggle_dataset(path_str)
+            description = "using generic loader"
+        return X, y, description, loader.label_encoders, None
+    except Exception as e:
+        return None, None, None, {}, str(e)
+
 def load_kaggle_data():
     """
     Load data from Kaggle datasets
@@ -56,41 +296,32 @@ def load_kaggle_data():
     # Try to load multiple datasets
     print(f"\nFound {len(csv_files)} dataset file(s). Loading...")
     
-    for dataset_path in csv_files:
+    # Parse several files concurrently in worker processes; a single file (or a
+    # pool that fails to start) is loaded in this process
+    paths = [str(p) for p in csv_files]
+    outcomes = None
+    if len(paths) > 1:
         try:
-            print(f"  Attempting to load: {dataset_path.name}")
-            X, y = None, None
-            
-            # Try specific loaders first
-            if 'disease' in dataset_path.name.lower() or 'symptom' in dataset_path.name.lower():
-                X, y = loader.load_diseases_symptoms_data(str(dataset_path))
-                if X is not None:
-                    print(f"    ✓ Loaded as Diseases and Symptoms dataset")
-            elif 'heart' in dataset_path.name.lower():
-                X, y = loader.load_heart_disease_data(str(dataset_path))
-                if X is not None:
-                    print(f"    ✓ Loaded as Heart Disease dataset")
-            elif 'stroke' in dataset_path.name.lower():
-                X, y = loader.load_stroke_data(str(dataset_path))
-                if X is not None:
-                    print(f"    ✓ Loaded as Stroke dataset")
-            elif 'parkinson' in dataset_path.name.lower():
-                X, y = loader.load_parkinsons_data(str(dataset_path))
-                if X is not None:
-                    print(f"    ✓ Loaded as Parkinson's dataset")
-            else:
-                # Generic loader
-                X, y = loader.load_kaggle_dataset(str(dataset_path))
-                if X is not None:
-                    print(f"    ✓ Loaded using generic loader")
-            
-            if X is not None and y is not None:
-                all_X.append(X)
-                all_y.append(y)
-                print(f"    Shape: {X.shape}, Classes: {len(np.unique(y))}")
+            with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+                outcomes = list(executor.map(_load_one, paths))
         except Exception as e:
-            print(f"    ✗ Error loading {dataset_path.name}: {e}")
+            print(f"  Parallel loading failed ({e}); loading sequentially")
+    if outcomes is None:
+        outcomes = [_load_one(p) for p in paths]
+    
+    for dataset_path, (X, y, description, label_encoders, error) in zip(csv_files, outcomes):
+        print(f"  Attempting to load: {dataset_path.name}")
+        if error is not None:
+            print(f"    ✗ Error loading {dataset_path.name}: {error}")
             continue
+        # Target encoders were fit in the worker; keep them as one shared loader would
+        loader.label_encoders.update(label_encoders)
+        if X is not None:
+            print(f"    ✓ Loaded {description}")
+        if X is not None and y is not None:
+            all_X.append(X)
+            all_y.append(y)
+            print(f"    Shape: {X.shape}, Classes: {len(np.unique(y))}")
     
     if not all_X:
         print("\n✗ No datasets could be loaded successfully")
@@ -152,42 +383,15 @@ def train_models():
         dt.fit(X_processed, y)
         models_dir = Path(__file__).parent / 'models'
         os.makedirs(models_dir, exist_ok=True)
-        joblib.dump(dt, str(models_dir / 'model.pkl'))
-        joblib.dump(None, str(models_dir / 'scaler.pkl'))
-        joblib.dump({}, str(models_dir / 'label_encoders.pkl'))
+        _dump_artifact(dt, models_dir / 'model.pkl')
+        _dump_artifact(None, models_dir / 'scaler.pkl')
+        _dump_artifact({}, models_dir / 'label_encoders.pkl')
         with open(models_dir / 'results.json', 'w') as f:
             json.dump({"dummy": True, "model": "DecisionTreeClassifier"}, f, indent=2)
         print("Synthetic model saved under ml/models/")
         print("="*60 + "\n")
         return
 
-    # Load data
-    print("\nLoading data...")
-    X, y, loader = load_kaggle_data()
-    
-    if X is None or y is None:
-        print("\nNo dataset available. Falling back to a small synthetic model so the service can run.")
-        from sklearn.tree import DecisionTreeClassifier as _DT
-        X = np.random.rand(500, 7)
-        y = np.random.randint(0, 4, size=500)
-        loader = DataLoader()
-        X_processed = X  # already numeric
-        dt = _DT(max_depth=5, random_state=42)
-        dt.fit(X_processed, y)
-        models_dir = Path(__file__).parent / 'models'
-        os.makedirs(models_dir, exist_ok=True)
-        joblib.dump(dt, str(models_dir / 'model.pkl'))
-        joblib.dump(None, str(models_dir / 'scaler.pkl'))
-        joblib.dump({}, str(models_dir / 'label_encoders.pkl'))
-        with open(models_dir / 'results.json', 'w') as f:
-            json.dump({"dummy": True, "model": "DecisionTreeClassifier", "reason": "no_dataset_found"}, f, indent=2)
-        print("Synthetic model saved under ml/models/")
-        print("="*60 + "\n")
-        return
-    
-    print(f"Dataset shape: {X.shape}")
-    print(f"Target distribution: {np.bincount(y)}")
-    
     # Default to fast training unless explicitly disabled by setting FAST_TRAIN=0
     if os.getenv('FAST_TRAIN', '') == '':
         os.environ['FAST_TRAIN'] = '1'
@@ -197,48 +401,98 @@ def train_models():
     # Skip slower models by default in fast mode unless user explicitly overrides
     if os.getenv('FAST_TRAIN') == '1':
         os.environ.setdefault('SKIP_RF', '1')
-        os.environ.setdefault('SKIP_GB', '1')
         os.environ.setdefault('SKIP_LOGREG', '1')
         os.environ.setdefault('SKIP_DT', '1')
         os.environ.setdefault('ET_TREES', '100')
     
-    # Optional row cap or fast training on large datasets
     fast = os.getenv('FAST_TRAIN', '0') == '1'
-    cap_rows_env = os.getenv('TRAIN_ROWS')
-    cap_rows = None
-    if cap_rows_env:
-        try:
-            cap_rows = int(cap_rows_env)
-        except Exception:
-            cap_rows = None
-    if (fast and len(y) > 10000) or (cap_rows is not None and len(y) > cap_rows):
-        try:
-            # Stratified subsample to ~10000 rows
-            desired = cap_rows if cap_rows is not None else 10000
-            frac = min(1.0, desired / float(len(y)))
-            # Use train_test_split to get a stratified subset
-            X_sub, _, y_sub, _ = train_test_split(
-                X, y, train_size=frac, random_state=42, stratify=y
-            )
-            X, y = X_sub, y_sub
-            print(f"Sampling enabled: using subset shape {X.shape}")
-        except Exception as sub_e:
-            print(f"FAST_TRAIN sampling failed: {sub_e}")
-    
-    # Preprocess
-    print("\nPreprocessing data...")
-    # Use the same loader to preserve target label encoder if present
-    X_processed = loader.preprocess_features(X, y, fit=True)
-    
+    # Per-class label counts, computed once and reused by the rare-class filter
+    classes = counts = None
+    
+    # Reuse the preprocessed matrix from an earlier run on the same data and settings
+    cache_path = _preprocess_cache_path()
+    cached = _load_preprocess_cache(cache_path) if cache_path is not None else None
+    if cached is not None:
+        X, X_processed, y, loader = cached
+        print(f"\nLoaded preprocessed data from cache: {cache_path.name} {X_processed.shape}")
+    else:
+        # Load data
+        print("\nLoading data...")
+        X, y, loader = load_kaggle_data()
+        
+        if X is None or y is None:
+            print("\nNo dataset available. Falling back to a small synthetic model so the service can run.")
+            from sklearn.tree import DecisionTreeClassifier as _DT
+            X = np.random.rand(500, 7)
+            y = np.random.randint(0, 4, size=500)
+            loader = DataLoader()
+            X_processed = X  # already numeric
+            dt = _DT(max_depth=5, random_state=42)
+            dt.fit(X_processed, y)
+            models_dir = Path(__file__).parent / 'models'
+            os.makedirs(models_dir, exist_ok=True)
+            _dump_artifact(dt, models_dir / 'model.pkl')
+            _dump_artifact(None, models_dir / 'scaler.pkl')
+            _dump_artifact({}, models_dir / 'label_encoders.pkl')
+            with open(models_dir / 'results.json', 'w') as f:
+                json.dump({"dummy": True, "model": "DecisionTreeClassifier", "reason": "no_dataset_found"}, f, indent=2)
+            print("Synthetic model saved under ml/models/")
+            print("="*60 + "\n")
+            return
+        
+        print(f"Dataset shape: {X.shape}")
+        classes, counts = np.unique(np.asarray(y), return_counts=True)
+        print(f"Target distribution: {dict(zip(classes.tolist(), counts.tolist()))}")
+        
+        # Optional row cap or fast training on large datasets
+        cap_rows_env = os.getenv('TRAIN_ROWS')
+        cap_rows = None
+        if cap_rows_env:
+            try:
+                cap_rows = int(cap_rows_env)
+            except Exception:
+                cap_rows = None
+        if (fast and len(y) > 10000) or (cap_rows is not None and len(y) > cap_rows):
+            try:
+                # Stratified subsample to ~10000 rows
+                desired = cap_rows if cap_rows is not None else 10000
+                frac = min(1.0, desired / float(len(y)))
+                X, y = _stratified_subset(X, y, frac)
+                classes = counts = None
+                print(f"Sampling enabled: using subset shape {X.shape}")
+            except Exception as sub_e:
+                print(f"FAST_TRAIN sampling failed: {sub_e}")
+        
+        # Preprocess
+        print("\nPreprocessing data...")
+        # Use the same loader to preserve target label encoder if present
+        X_processed = loader.preprocess_features(X, y, fit=True)
+
+        # Contiguous float32 features and int32 labels halve the bytes the tree and
+        # linear solvers stream per pass (no copy when already in that layout)
+        if os.getenv('DOWNCAST_FP32', '1') == '1':
+            X_processed = np.ascontiguousarray(X_processed, dtype=np.float32)
+            y = np.asarray(y)
+            if y.dtype.kind in 'iu':
+                y = np.ascontiguousarray(y, dtype=np.int32)
+        
+        if cache_path is not None:
+            _save_preprocess_cache(cache_path, X, X_processed, y, loader)
+
     # Remove rare classes that cannot be stratified (fewer than 2 samples)
     try:
-        import numpy as _np
-        import pandas as _pd
-        y_series = _pd.Series(y)
-        counts = y_series.value_counts()
-        valid_classes = counts[counts >= 2].index
-        valid_idx = y_series.isin(valid_classes).to_numpy()
-        if hasattr(X_processed, 'shape') and len(X_processed) == len(y):
+        y = np.asarray(y)
+        if counts is None:
+            classes, counts = np.unique(y, return_counts=True)
+        valid_classes = classes[counts >= 2]
+        if len(valid_classes) < len(classes) and len(X_processed) == len(y):
+            if y.dtype.kind in 'iu' and classes[0] >= 0:
+                # Encoded labels: one gather through a per-class keep table
+                keep = np.zeros(classes[-1] + 1, dtype=bool)
+                keep[valid_classes] = True
+                valid_idx = keep[y]
+            else:
+                valid_idx = np.isin(y, valid_classes)
             X_processed = X_processed[valid_idx]
             y = y[valid_idx]
         print(f"Filtered classes <2 samples; new shape: {X_processed.shape}")
@@ -255,14 +509,15 @@ def train_models():
     results = {}
     
     print("\nTraining models...")
+    # Enabled models as (name, label, estimator, X, y); fit further below
+    fit_jobs = []
     
     # Decision Tree
     skip_dt = os.getenv('SKIP_DT', '0') == '1'
     if not skip_dt:
         print("  • Training Decision Tree...")
         dt = DecisionTreeClassifier(max_depth=10, random_state=42)
-        dt.fit(X_train, y_train)
-        models['decision_tree'] = dt
+        fit_jobs.append(('decision_tree', 'Decision Tree', dt, X_train, y_train))
     
     # Random Forest
     skip_rf = os.getenv('SKIP_RF', '0') == '1'
@@ -271,8 +526,7 @@ def train_models():
         rf_trees_env = os.getenv('RF_TREES')
         rf_estimators = int(rf_trees_env) if rf_trees_env else (100 if not fast else 60)
         rf = RandomForestClassifier(n_estimators=rf_estimators, max_depth=15, random_state=42, n_jobs=-1)
-        rf.fit(X_train, y_train)
-        models['random_forest'] = rf
+        fit_jobs.append(('random_forest', 'Random Forest', rf, X_train, y_train))
 
     # Extra Trees (very fast, good baseline)
     skip_et = os.getenv('SKIP_ET', '0') == '1'
@@ -281,18 +535,19 @@ def train_models():
         et_trees_env = os.getenv('ET_TREES')
         et_estimators = int(et_trees_env) if et_trees_env else (200 if not fast else 100)
         et = ExtraTreesClassifier(n_estimators=et_estimators, random_state=42, n_jobs=-1)
-        et.fit(X_train, y_train)
-        models['extra_trees'] = et
+        fit_jobs.append(('extra_trees', 'Extra Trees', et, X_train, y_train))
     
     # Optional Logistic Regression (can be slow on very large datasets)
     skip_logreg = os.getenv('SKIP_LOGREG', '0') == '1'
     use_logreg = (os.getenv('USE_LOGREG', '1') == '1') and not skip_logreg
     if use_logreg:
         print("  • Training Logistic Regression...")
-        # saga handles multinomial + l1/l2; faster for large/sparse
         lr_max_iter_env = os.getenv('LR_MAX_ITER')
         lr_max_iter = int(lr_max_iter_env) if lr_max_iter_env else (200 if not fast else 120)
-        solver = os.getenv('LR_SOLVER', 'saga')
+        # lbfgs converges in far fewer passes on small/medium dense data; saga
+        # (multinomial + l1/l2) pays off on large or sparse inputs
+        use_saga = sparse.issparse(X_train) or X_train.shape[0] > 50000
+        solver = os.getenv('LR_SOLVER', 'saga' if use_saga else 'lbfgs')
         # some sklearn versions do not support n_jobs on LogisticRegression; guard it
         lr_kwargs = dict(max_iter=lr_max_iter, multi_class='auto', solver=solver, n_jobs=-1 if solver != 'lbfgs' else None)
         try:
@@ -303,11 +558,7 @@ def train_models():
         except Exception:
             pass
         logreg = LogisticRegression(**lr_kwargs)
-        try:
-            logreg.fit(X_train, y_train)
-            models['logistic_regression'] = logreg
-        except Exception as e:
-            print(f"    Skipping Logistic Regression due to error: {e}")
+        fit_jobs.append(('logistic_regression', 'Logistic Regression', logreg, X_train, y_train))
 
     # Optional very fast linear model (SGD)
     use_sgd = os.getenv('USE_SGD', '0') == '1'
@@ -317,53 +568,83 @@ def train_models():
         sgd_max_iter = int(sgd_max_iter_env) if sgd_max_iter_env else (1000 if not fast else 400)
         sgd_loss = os.getenv('SGD_LOSS', 'log_loss')  # 'hinge' or 'log_loss'
         sgd = SGDClassifier(loss=sgd_loss, max_iter=sgd_max_iter, n_jobs=-1, random_state=42)
-        try:
-            sgd.fit(X_train, y_train)
-            models['sgd_classifier'] = sgd
-        except Exception as e:
-            print(f"    Skipping SGDClassifier due to error: {e}")
+        fit_jobs.append(('sgd_classifier', 'SGDClassifier', sgd, X_train, y_train))
     
     # SVM (fast configuration when enabled)
     disable_svm = os.getenv('DISABLE_SVM', '1') == '1'
     if not disable_svm:
         print("  • Training SVM...")
-        # Use linear kernel for speed; enable probability to support soft voting
+        # Linear kernel by default; probabilities for soft voting and the API come
+        # from a 3-fold sigmoid calibration instead of SVC's internal 5-fold Platt fit
         svm_subset = int(os.getenv('SVM_TRAIN_ROWS', '6000'))
         X_svm, y_svm = X_train, y_train
         if fast and len(y_train) > svm_subset:
-            X_svm, _, y_svm, _ = train_test_split(X_train, y_train, train_size=svm_subset, random_state=42, stratify=y_train)
+            X_svm, y_svm = _stratified_subset(X_train, y_train, svm_subset)
             print(f"    SVM: using subset {X_svm.shape}")
         svm_kernel = os.getenv('SVM_KERNEL', 'linear')
-        svm = SVC(kernel=svm_kernel, probability=True, random_state=42)
-        try:
-            svm.fit(X_svm, y_svm)
-            models['svm'] = svm
-        except Exception as e:
-            print(f"    Skipping SVM due to error/timeout: {e}")
-    
-    # Gradient Boosting
+        svm_proba = os.getenv('SVM_PROBA', '1') == '1'
+        # 3-fold calibration needs three rows of every class in the SVM training set
+        can_calibrate = np.unique(y_svm, return_counts=True)[1].min() >= 3
+        if svm_kernel == 'linear' and (can_calibrate or not svm_proba):
+            # liblinear scales as O(n*f) rather than the O(n^2) kernel solver
+            svm = LinearSVC(C=1.0, dual=False, random_state=42)
+            if svm_proba:
+                svm = CalibratedClassifierCV(svm, cv=3, method='sigmoid')
+        else:
+            svm = SVC(kernel=svm_kernel, probability=True, random_state=42)
+        fit_jobs.append(('svm', 'SVM', svm, X_svm, y_svm))
+    
+    # Gradient Boosting (histogram-based; cheap enough to keep on in fast mode)
     skip_gb = os.getenv('SKIP_GB', '0') == '1'
     if not skip_gb:
         print("  • Training Gradient Boosting...")
         gb_trees_env = os.getenv('GB_TREES')
         gb_estimators = int(gb_trees_env) if gb_trees_env else (100 if not fast else 60)
-        gb = GradientBoostingClassifier(n_estimators=gb_estimators, learning_rate=0.1, random_state=42)
-        gb.fit(X_train, y_train)
-        models['gradient_boosting'] = gb
+        # Early stopping holds out a stratified validation split, which needs at
+        # least two training rows per class
+        gb_early_stop = bool(np.unique(y_train, return_counts=True)[1].min() >= 2)
+        gb = HistGradientBoostingClassifier(max_iter=gb_estimators, learning_rate=0.1, early_stopping=gb_early_stop, random_state=42)
+        fit_jobs.append(('gradient_boosting', 'Gradient Boosting', gb, X_train, y_train))
+    
+    # Fit the independent models concurrently, one process each with single-threaded
+    # internals. A kernel SVC stays in this process: its kernel cache makes workers too large.
+    pooled = [job for job in fit_jobs if not isinstance(job[2], SVC)]
+    parallel_fit = os.getenv('PARALLEL_FIT', '1') == '1' and len(pooled) > 1
+    fitted = {}
+    if parallel_fit:
+        n_workers = min(len(pooled), os.cpu_count() or 1)
+        outcomes = Parallel(n_jobs=n_workers, backend='loky')(
+            delayed(_fit_model)(est, X_fit, y_fit, single_threaded=True)
+            for _, _, est, X_fit, y_fit in pooled
+        )
+        fitted.update(zip((job[0] for job in pooled), outcomes))
+    for name, _, est, X_fit, y_fit in fit_jobs:
+        if name not in fitted:
+            fitted[name] = _fit_model(est, X_fit, y_fit)
+    
+    # Keep the declaration order (it breaks best-model ties)
+    for name, label, _, _, _ in fit_jobs:
+        model, error = fitted[name]
+        if error is not None:
+            print(f"    Skipping {label} due to error: {error}")
+        else:
+            models[name] = model
     
     # Optional soft voting ensemble when multiple probabilistic models are available
     use_ensemble = os.getenv('USE_ENSEMBLE', '1') == '1'
     if use_ensemble:
         try:
-            voters = []
-            for name, mdl in models.items():
-                if hasattr(mdl, 'predict_proba'):
-                    voters.append((name, mdl))
+            # Probabilistic models only; averaging probabilities also needs every voter
+            # to know all training classes (the SVM may have been fit on a subset)
+            classes = np.unique(y_train)
+            voters = [
+                (name, mdl) for name, mdl in models.items()
+                if getattr(mdl, 'predict_proba', None) is not None
+                and np.array_equal(getattr(mdl, 'classes_', None), classes)
+            ]
             if len(voters) >= 2:
                 print("  • Building Soft Voting Ensemble...")
-                ensemble = VotingClassifier(estimators=voters, voting='soft', n_jobs=-1)
-                ensemble.fit(X_train, y_train)
-                models['ensemble_soft'] = ensemble
+                models['ensemble_soft'] = _prefit_soft_voting(voters, y_train)
         except Exception as e:
             print(f"    Skipping ensemble due to error: {e}")
 
@@ -381,75 +662,68 @@ def train_models():
     elif hasattr(loader, 'feature_names'):
         feature_names = loader.feature_names
     
-    for name, model in models.items():
-        print(f"\nEvaluating {name}...")
-        try:
-            metrics = evaluator.evaluate_model(model, X_test, y_test, name, y_train)
-            results[name] = metrics
-            
-            # Try SHAP and LIME explanations (optional, may fail)
-            if os.getenv('ENABLE_SHAP', '0') == '1':
-                try:
-                    evaluator.explain_with_shap(model, X_test[:50], feature_names, name)
-                except Exception:
-                    pass
-            
-            if os.getenv('ENABLE_LIME', '0') == '1':
-                try:
-                    evaluator.explain_with_lime(model, X_test[:10], feature_names, name)
-                except Exception:
-                    pass
-        except Exception as e:
-            print(f"  ⚠ Evaluation error: {e}")
-            # Fallback to basic metrics
-            y_pred = model.predict(X_test)
-            results[name] = {
-                'accuracy': float(accuracy_score(y_test, y_pred)),
-                'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
-                'recall': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
-                'f1_score': float(f1_score(y_test, y_pred, average='weighted', zero_division=0)),
-                'roc_auc': 0.0,
-                'confusion_matrix': confusion_matrix(y_test, y_pred).tolist()
-            }
-    
-    # Generate comparison visualizations
+    # Cast the test matrix once to the training layout shared by every model
+    # (no copy when it is already contiguous in that dtype)
+    X_test = np.ascontiguousarray(X_test, dtype=X_train.dtype)
+    
+    # predict/predict_proba release the GIL in sklearn's compiled code, so models
+    # are scored from a thread pool; the evaluator serializes its plotting
+    outcomes = Parallel(n_jobs=-1, backend='threading')(
+        delayed(_evaluate_one)(evaluator, name, model, X_test, y_test, y_train)
+        for name, model in models.items()
+    )
+    results.update(zip(models, outcomes))
+    
+    # Try SHAP and LIME explanations (optional, may fail), one process per model
+    shap_on = os.getenv('ENABLE_SHAP', '0') == '1'
+    lime_on = os.getenv('ENABLE_LIME', '0') == '1'
+    if shap_on or lime_on:
+        output_dir = str(evaluator.output_dir)
+        n_workers = min(len(models), os.cpu_count() or 1)
+        Parallel(n_jobs=n_workers, backend='loky')(
+            delayed(_explain_model)(output_dir, name, model, X_test[:50], feature_names, shap_on, lime_on)
+            for name, model in models.items()
+        )
+    
+    # Generate comparison visualizations in a child process so rendering overlaps
+    # with saving the model; results.json is still written from this process.
+    # Spawned rather than forked: loky workers and evaluation threads may hold locks
     print("\nGenerating comparison visualizations...")
-    evaluator.plot_model_comparison()
-    evaluator.save_results()
+    render = mp.get_context('spawn').Process(target=_render_evaluation, args=(evaluator.results, str(evaluator.output_dir)))
+    render.start()
     evaluator.print_summary()
     
     # Save best model
     best_model_name = max(results, key=lambda x: results[x]['f1_score'])
     best_model = models[best_model_name]
-    
+    # The API scores one row (or a small batch) per call, where spinning up a
+    # thread pool per predict costs more than walking the trees serially; an
+    # ensemble's own n_jobs only covers fitting, so its members are set too
+    members = best_model.estimators_ if isinstance(best_model, VotingClassifier) else []
+    for estimator in [best_model, *members]:
+        if 'n_jobs' in estimator.get_params(deep=False):
+            estimator.set_params(n_jobs=1)
+
     models_dir = Path(__file__).parent / 'models'
     os.makedirs(models_dir, exist_ok=True)
-    joblib.dump(best_model, str(models_dir / 'model.pkl'))
-    joblib.dump(loader.scaler, str(models_dir / 'scaler.pkl'))
-    joblib.dump(loader.label_encoders, str(models_dir / 'label_encoders.pkl'))
+    _dump_artifact(best_model, models_dir / 'model.pkl')
+    _dump_artifact(loader.scaler, models_dir / 'scaler.pkl')
+    _dump_artifact(loader.label_encoders, models_dir / 'label_encoders.pkl')
     
     # Save symptom vocabulary if training on disease/symptom matrix
-    try:
-        symptom_vocab = []
-        if isinstance(X, pd.DataFrame):
-            symptom_vocab = list(X.columns)
-        elif hasattr(loader, 'symptom_columns'):
-            try:
-                cols = getattr(loader, 'symptom_columns')
-                if isinstance(cols, (list, tuple)):
-                    symptom_vocab = list(cols)
-            except Exception:
-                symptom_vocab = []
-        if symptom_vocab:
-            with open(models_dir / 'symptom_vocabulary.json', 'w') as f:
-                json.dump(symptom_vocab, f, indent=2)
-    except Exception as _:
-        pass
+    symptom_vocab = X.columns.to_list() if isinstance(X, pd.DataFrame) else getattr(loader, 'symptom_columns', []) or []
+    if symptom_vocab:
+        with open(models_dir / 'symptom_vocabulary.json', 'w') as f:
+            json.dump(list(symptom_vocab), f, indent=2)
     
     # Save results
     with open(models_dir / 'results.json', 'w') as f:
         json.dump(results, f, indent=2)
     
+    render.join()
+    if render.exitcode != 0:
+        print(f"  ⚠ Comparison plots failed (exit code {render.exitcode})")
+    
     print("\n" + "="*60)
     print(f"✓ Best model: {best_model_name}")
     print(f"✓ Model saved to models/model.pkl")